@@ -1,21 +1,166 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Request, Response, g, jsonify, request
 from dotenv import load_dotenv
+from io import BytesIO
 import os
-from resume_extractor import ResumeExtractor  # Assuming you have a module named resume_extractor with the class ResumeExtractor
-from werkzeug.utils import secure_filename
+import json
+import logging
+import time
+from resume_extractor import ResumeExtractor, FileTooLargeError, MAX_UPLOAD_SIZE  # Assuming you have a module named resume_extractor with the class ResumeExtractor
 from gen import GenAgent
 from matching import enhanced_ranking
 from enhance_resume_agent import EnhancedRankingAgent
 from bot_chat_agent import BotChatAgent
+from chat_sessions import ChatSessions
+from jd_cache import JDCache
+from candidate_store import CandidateStore
+from batch_ingest import BatchIngestor
+from embeddings import EmbeddingStore, get_embedder
+from scoring_profiles import ScoringProfiles
+from job_queue import JobFailed, JobQueue
+from single_flight import single_flight_stats
+from llm_client import LLMClient
+from metrics import REQUEST_DURATION, render_metrics, start_request_spans
+from profiler import SlowRequestProfiler
 load_dotenv()
 
-UPLOAD_FOLDER = 'uploads'
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logger = logging.getLogger(__name__)
+
+# Whole-request cap (batch uploads carry many files); single files are
+# limited to MAX_UPLOAD_SIZE.
+MAX_REQUEST_SIZE = int(os.getenv("MAX_REQUEST_SIZE", 256 * 1024 * 1024))
+
+class UploadRequest(Request):
+    """Keeps uploaded files in memory; werkzeug spools uploads over 500 KB to temp files.
+
+    MAX_CONTENT_LENGTH bounds the whole request, so the memory is bounded too.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return BytesIO()
 
 app = Flask(__name__)
+app.request_class = UploadRequest
+app.config['MAX_CONTENT_LENGTH'] = MAX_REQUEST_SIZE
+
+# Models load lazily on first use. PRELOAD_MODELS=1 loads them at import, so a
+# preloading server (gunicorn --preload) shares them with its forked workers.
+if os.getenv("PRELOAD_MODELS") == "1":
+    get_embedder()
+
+@app.before_request
+def start_request_timing():
+    g.request_start = time.perf_counter()
+    g.spans = start_request_spans()
+    g.profiler = SlowRequestProfiler().start()
+
+@app.after_request
+def record_request_timing(response):
+    # Streaming responses are measured until their headers are returned.
+    elapsed = time.perf_counter() - g.request_start
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    REQUEST_DURATION.observe(elapsed, request.method, endpoint, response.status_code)
+    timings = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in g.spans]
+    response.headers['Server-Timing'] = ', '.join(timings + [f"total;dur={elapsed * 1000:.1f}"])
+    SlowRequestProfiler().finish(g.profiler, f"{request.method} {endpoint}", elapsed)
+    return response
+
+@app.errorhandler(413)
+def request_too_large(e):
+    return jsonify({"error": "File too large"}), 413
+
+def upload_too_large():
+    # Multipart overhead is small, so the declared length is a good early bound.
+    return request.content_length is not None and request.content_length > MAX_UPLOAD_SIZE + 64 * 1024
+
+def requested_profiles(data):
+    """The scoring profile(s) a request asks for, as (profile, profiles).
+
+    Raises ValueError for unknown profile names or invalid inline weights.
+    """
+    profiles = ScoringProfiles()
+    if data.get('profiles') is not None:
+        return None, profiles.resolve_many(data['profiles'])
+    return profiles.resolve(data.get('profile'), data.get('weights')), None
+
+def retrieval_params(data):
+    """Validated (k, min_skill_match) of a ranking request; raises ValueError for bad values."""
+    k = data.get('k')
+    if k is not None and (isinstance(k, bool) or not isinstance(k, int) or k < 1):
+        raise ValueError("k must be a positive integer or null")
+    min_skill_match = data.get('min_skill_match')
+    if min_skill_match is None:
+        min_skill_match = 0.0
+    if isinstance(min_skill_match, bool) or not isinstance(min_skill_match, (int, float)) \
+            or not 0 <= min_skill_match <= 1:
+        raise ValueError("min_skill_match must be a number between 0 and 1")
+    return k, float(min_skill_match)
+
+def async_mode():
+    # ?mode=async queues the request on the JobQueue instead of answering inline.
+    return request.args.get('mode') == 'async'
+
+def enqueue(kind, payload, data=None):
+    job_id, deduplicated = JobQueue().submit(
+        kind, payload, data=data, priority=request.args.get('priority', 0, type=int),
+    )
+    return jsonify({
+        "message": "Job accepted",
+        "job_id": job_id,
+        "deduplicated": deduplicated,
+        "status_url": f"/jobs/{job_id}",
+    }), 202
+
+def index_resume(formated, candidate_id=None):
+    try:
+        return CandidateStore().add(formated, candidate_id=candidate_id)
+    except Exception as e:
+        logger.exception("Could not index resume in candidate store: %s", e)
+        return None
+
+def chat_documents(data):
+    """(label, value) of the documents a chat request attaches: the JD, the resume and any others."""
+    if not isinstance(data, dict):
+        raise ValueError("Invalid input")
+    others = data.get('documents') or {}
+    if not isinstance(others, dict):
+        raise ValueError("documents must be an object of label: document")
+    documents = [(label, data[label]) for label in ('job_description', 'resume') if data.get(label)]
+    return documents + list(others.items())
+
+def chat_session(data):
+    """The session a chat request continues (session_id) or starts (attached documents), else None.
+
+    Raises LookupError for an unknown or expired session ID.
+    """
+    if data.get('session_id'):
+        session = ChatSessions().get(data['session_id'])
+        if session is None:
+            raise LookupError("Unknown or expired chat session")
+        return session
+    documents = chat_documents(data)
+    return BotChatAgent().start_session(documents) if documents else None
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def sse_response(events):
+    return Response(events, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+
+# The LLM-backed views are synchronous. Under WSGI (flask run, gunicorn) an
+# async view still holds its worker thread until the coroutine finishes, so it
+# would not raise concurrency beyond workers x threads anyway; the shared
+# LLMClient loop only bounds and retries the Gemini calls. For many slow calls
+# use ?mode=async (JobQueue, poll /jobs/<id>) or the /stream endpoints, which
+# also cancel the Gemini call when the client disconnects.
 @app.route('/extract_resume', methods=['POST'])
 def extract_resume():
     try:
+        if upload_too_large():
+            return jsonify({"error": "File too large"}), 413
         if 'resume' not in request.files:
             return jsonify({"error": "No file part in the request"}), 400
 
@@ -23,23 +168,82 @@ def extract_resume():
         if file.filename == '':
             return jsonify({"error": "No selected file"}), 400
 
-        filename = secure_filename(file.filename)
-        file_path = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(file_path)
-
         extractor = ResumeExtractor()
-        extracted_text = extractor.extract_resume_text(file_path)
+        if async_mode():
+            data = file.stream.read(MAX_UPLOAD_SIZE + 1)
+            if len(data) > MAX_UPLOAD_SIZE:
+                raise FileTooLargeError(f"File too large, the limit is {MAX_UPLOAD_SIZE} bytes.")
+            if extractor.detect_format(data) is None:
+                raise ValueError("PDF or DOCX only.")
+            return enqueue('extract_resume', {"candidate_id": request.form.get('candidate_id')}, data)
+
+        extracted_text = extractor.extract_resume_stream(file.stream)
         
         formated = GenAgent().generate_content(extracted_text)
+        candidate_id = index_resume(formated, request.form.get('candidate_id'))
 
-        return jsonify({"message": "Resume extracted", "text": formated}), 200
+        return jsonify({"message": "Resume extracted", "text": formated, "candidate_id": candidate_id}), 200
 
+    except FileTooLargeError as e:
+        return jsonify({"error": str(e)}), 413
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     
+@app.route('/extract_resumes/batch', methods=['POST'])
+def extract_resumes_batch():
+    try:
+        uploads = [f for key in request.files for f in request.files.getlist(key) if f.filename]
+        if not uploads:
+            return jsonify({"error": "No file part in the request"}), 400
+
+        job = BatchIngestor().submit(uploads)
+        return jsonify({"message": "Batch accepted", "job_id": job.id, "total": job.total}), 202
+
+    except FileTooLargeError as e:
+        return jsonify({"error": str(e)}), 413
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/extract_resumes/batch/<job_id>', methods=['GET'])
+def extract_resumes_batch_status(job_id):
+    batch = JobQueue().get_batch(job_id)
+    if batch is None:
+        return jsonify({"error": "Unknown job_id"}), 404
+    return jsonify(batch), 200
+
+@app.route('/extract_resumes/batch/<job_id>/events', methods=['GET'])
+def extract_resumes_batch_events(job_id):
+    if JobQueue().get_batch(job_id, start=None) is None:
+        return jsonify({"error": "Unknown job_id"}), 404
+
+    def events():
+        sent = 0
+        while True:
+            batch = JobQueue().wait_batch(job_id, sent, timeout=15)
+            if batch is None:
+                yield sse('error', {"error": "Unknown job_id"})
+                return
+            results = batch.pop('results')
+            for result in results:
+                yield sse('result', result)
+            sent += len(results)
+            if batch['done'] and sent >= batch['total']:
+                break
+            if not results:
+                yield ": keepalive\n\n"
+        yield sse('done', batch)
+
+    return sse_response(events())
+
 @app.route('/extract_job_description', methods=['POST'])
 def extract_job_description():
     try:
+        if upload_too_large():
+            return jsonify({"error": "File too large"}), 413
         if 'job_description' not in request.files:
             return jsonify({"error": "No file part in the request"}), 400
 
@@ -47,15 +251,15 @@ def extract_job_description():
         if file.filename == '':
             return jsonify({"error": "No selected file"}), 400
         
-        filename = secure_filename(file.filename)
-        file_path = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(file_path)
-
         extractor = ResumeExtractor()
-        extracted_text = extractor.extract_resume_text(file_path)
+        extracted_text = extractor.extract_resume_stream(file.stream)
         
         return jsonify({"message": "Job description extracted", "text": extracted_text}), 200
 
+    except FileTooLargeError as e:
+        return jsonify({"error": str(e)}), 413
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     
@@ -68,12 +272,96 @@ def resume_scores():
         
         job_description = data['job_description']
         resumes_data = data['resumes_data']
-        scores_json = enhanced_ranking(extracted_jd=job_description, resumes_data=resumes_data)
+        profile, profiles = requested_profiles(data)
+        k, min_skill_match = retrieval_params(data)
+        if async_mode():
+            return enqueue('resume_scores', {
+                key: data[key] for key in
+                ('job_description', 'resumes_data', 'k', 'min_skill_match', 'profile', 'profiles', 'weights')
+                if key in data
+            })
+
+        scores_json = enhanced_ranking(
+            extracted_jd=job_description,
+            resumes_data=resumes_data,
+            k=k,
+            min_skill_match=min_skill_match,
+            profile=profile,
+            profiles=profiles,
+        )
         return jsonify({"message": "Resume scores generated", "scores": scores_json}), 200
 
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     
+@app.route('/job_descriptions', methods=['post'])
+def save_job_description():
+    try:
+        data = request.get_json()
+        if not data or 'job_description' not in data:
+            return jsonify({"error": "Invalid input"}), 400
+
+        jd_id, parsed = CandidateStore().save_job_description(data['job_description'])
+        return jsonify({"message": "Job description saved", "jd_id": jd_id, "job_description": parsed}), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/rank_candidates', methods=['post'])
+def rank_candidates():
+    try:
+        data = request.get_json()
+        if not data or ('jd_id' not in data and 'job_description' not in data):
+            return jsonify({"error": "Invalid input"}), 400
+
+        profile, profiles = requested_profiles(data)
+        k, min_skill_match = retrieval_params(data)
+        store = CandidateStore()
+        if 'jd_id' in data:
+            job_description = store.get_job_description(data['jd_id'])
+            if job_description is None:
+                return jsonify({"error": "Unknown jd_id"}), 404
+        else:
+            _, job_description = store.save_job_description(data['job_description'])
+
+        scores = store.rank(
+            job_description,
+            candidate_ids=data.get('candidate_ids'),
+            skills=data.get('skills'),
+            min_experience=data.get('min_experience'),
+            k=k,
+            min_skill_match=min_skill_match,
+            profile=profile,
+            profiles=profiles,
+        )
+        return jsonify({"message": "Candidates ranked", "scores": scores}), 200
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/scoring_profiles', methods=['get'])
+def list_scoring_profiles():
+    return jsonify({"profiles": ScoringProfiles().to_dict()}), 200
+
+@app.route('/scoring_profiles', methods=['post'])
+def save_scoring_profile():
+    try:
+        data = request.get_json()
+        if not data or 'name' not in data or 'weights' not in data:
+            return jsonify({"error": "Invalid input"}), 400
+
+        profile = ScoringProfiles().register(data['name'], data['weights'])
+        return jsonify({"message": "Scoring profile saved", "profile": profile.to_dict()}), 200
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/enhance_resume', methods=['post'])
 def enhance_resume():
     try:
@@ -84,19 +372,21 @@ def enhance_resume():
         resume_text = data['resume']
         job_description = data['job_description']
         current_info = data.get('current_info', {})
-        weights = data.get('weights', {
-            "tfidf": 0.1,
-            "semantic": 0.2,
-            "skill_matching": 0.45,
-            "experience_matching": 0.15,
-            "education_matching": 0.1
-        })
+        try:
+            profile = ScoringProfiles().resolve(data.get('profile'), data.get('weights'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if async_mode():
+            return enqueue('enhance_resume', {
+                key: data[key] for key in ('resume', 'job_description', 'current_info', 'profile', 'weights')
+                if key in data
+            })
         
         enhanced_text = EnhancedRankingAgent().generate_content(
             job_description=job_description,
             resume=resume_text,
             current_info=current_info,
-            weights=weights
+            profile=profile
         )
         
         return jsonify({"message": "Resume enhanced", "text": enhanced_text}), 200
@@ -104,6 +394,122 @@ def enhance_resume():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     
+@app.route('/enhance_resume/stream', methods=['post'])
+def enhance_resume_stream():
+    data = request.get_json()
+    if not data or 'resume' not in data or 'job_description' not in data:
+        return jsonify({"error": "Invalid input"}), 400
+    try:
+        profile = ScoringProfiles().resolve(data.get('profile'), data.get('weights'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    fields = EnhancedRankingAgent().stream_content(
+        job_description=data['job_description'],
+        resume=data['resume'],
+        current_info=data.get('current_info', {}),
+        profile=profile,
+    )
+
+    def events():
+        enhanced = {}
+        try:
+            for key, value in fields:
+                enhanced[key] = value
+                yield sse('field', {"key": key, "value": value})
+            yield sse('done', {"message": "Resume enhanced", "text": enhanced})
+        except Exception as e:
+            yield sse('error', {"error": str(e)})
+        finally:
+            fields.close()
+
+    return sse_response(events())
+
+def extract_resume_job(payload, data):
+    try:
+        extracted_text = ResumeExtractor().extract_resume_bytes(data)
+    except FileTooLargeError as e:
+        raise JobFailed(str(e), 413)
+    except ValueError as e:
+        raise JobFailed(str(e), 400)
+    formated = GenAgent().generate_content(extracted_text)
+    candidate_id = index_resume(formated, payload.get('candidate_id'))
+    return {"message": "Resume extracted", "text": formated, "candidate_id": candidate_id}
+
+def resume_scores_job(payload, data):
+    try:
+        profile, profiles = requested_profiles(payload)
+        k, min_skill_match = retrieval_params(payload)
+    except ValueError as e:
+        raise JobFailed(str(e), 400)
+    scores_json = enhanced_ranking(
+        extracted_jd=payload['job_description'],
+        resumes_data=payload['resumes_data'],
+        k=k,
+        min_skill_match=min_skill_match,
+        profile=profile,
+        profiles=profiles,
+    )
+    return {"message": "Resume scores generated", "scores": scores_json}
+
+def enhance_resume_job(payload, data):
+    try:
+        profile = ScoringProfiles().resolve(payload.get('profile'), payload.get('weights'))
+    except ValueError as e:
+        raise JobFailed(str(e), 400)
+    enhanced_text = EnhancedRankingAgent().generate_content(
+        job_description=payload['job_description'],
+        resume=payload['resume'],
+        current_info=payload.get('current_info', {}),
+        profile=profile,
+    )
+    return {"message": "Resume enhanced", "text": enhanced_text}
+
+JobQueue.register('extract_resume', extract_resume_job)
+JobQueue.register('resume_scores', resume_scores_job)
+JobQueue.register('enhance_resume', enhance_resume_job)
+
+@app.route('/jobs/stats', methods=['GET'])
+def job_stats():
+    return jsonify(JobQueue().stats()), 200
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    # ?wait=N long-polls for up to N seconds (at most 60) until the job finishes.
+    wait = min(request.args.get('wait', 0, type=float), 60)
+    job = JobQueue().wait(job_id, wait) if wait > 0 else JobQueue().get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job_id"}), 404
+    return jsonify(job), 200
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    queue = JobQueue()
+    job = queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job_id"}), 404
+
+    def events():
+        status = None
+        last_event = time.monotonic()
+        while True:
+            current = queue.wait(job_id, queue.poll_interval)
+            if current is None:
+                yield sse('error', {"error": "Unknown job_id"})
+                break
+            if current['status'] in ('done', 'error'):
+                yield sse(current['status'], current)
+                break
+            if current['status'] != status:
+                status = current['status']
+                last_event = time.monotonic()
+                yield sse('status', current)
+            elif time.monotonic() - last_event > 15:
+                last_event = time.monotonic()
+                yield ": keepalive\n\n"
+
+    return sse_response(events())
+
 @app.route('/bot_chat', methods=['post'])
 def bot_chat():
     try:
@@ -112,13 +518,104 @@ def bot_chat():
             return jsonify({"error": "Invalid input"}), 400
         
         message = data['message']
-        response = BotChatAgent().generate_content(message)
+        session = chat_session(data)
+        response = BotChatAgent().generate_content(message, session=session)
         
-        return jsonify({"message": "Chat response generated", "response": response}), 200
+        result = {"message": "Chat response generated", "response": response}
+        if session is not None:
+            result["session_id"] = session.id
+        return jsonify(result), 200
 
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except LookupError as e:
+        return jsonify({"error": str(e)}), 404
     except Exception as e:
-        print(e)
+        logger.exception("Chat request failed: %s", e)
         return jsonify({"error": str(e)}), 500
 
+@app.route('/bot_chat/stream', methods=['post'])
+def bot_chat_stream():
+    data = request.get_json()
+    if not data or 'message' not in data:
+        return jsonify({"error": "Invalid input"}), 400
+
+    try:
+        session = chat_session(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except LookupError as e:
+        return jsonify({"error": str(e)}), 404
+    chunks = BotChatAgent().stream_content(data['message'], session=session)
+
+    def events():
+        try:
+            for chunk in chunks:
+                yield sse('message', {"text": chunk})
+            done = {"message": "Chat response generated"}
+            if session is not None:
+                done["session_id"] = session.id
+            yield sse('done', done)
+        except Exception as e:
+            logger.exception("Chat stream failed: %s", e)
+            yield sse('error', {"error": str(e)})
+        finally:
+            chunks.close()
+
+    return sse_response(events())
+
+@app.route('/bot_chat/sessions', methods=['post'])
+def create_chat_session():
+    try:
+        data = request.get_json(silent=True) or {}
+        documents = chat_documents(data)
+        if not documents:
+            return jsonify({"error": "Invalid input"}), 400
+        session = BotChatAgent().start_session(documents)
+        return jsonify({"message": "Chat session created", **session.info()}), 201
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.exception("Could not create chat session: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/bot_chat/sessions', methods=['GET'])
+def chat_sessions_stats():
+    return jsonify(ChatSessions().stats()), 200
+
+@app.route('/bot_chat/sessions/<session_id>', methods=['GET'])
+def get_chat_session(session_id):
+    session = ChatSessions().get(session_id)
+    if session is None:
+        return jsonify({"error": "Unknown or expired chat session"}), 404
+    return jsonify(session.info()), 200
+
+@app.route('/bot_chat/sessions/<session_id>', methods=['DELETE'])
+def delete_chat_session(session_id):
+    if not ChatSessions().delete(session_id):
+        return jsonify({"error": "Unknown or expired chat session"}), 404
+    return jsonify({"message": "Chat session deleted"}), 200
+
+@app.route('/jd_cache/stats', methods=['GET'])
+def jd_cache_stats():
+    return jsonify(JDCache().stats()), 200
+
+@app.route('/embeddings/stats', methods=['GET'])
+def embeddings_stats():
+    return jsonify(EmbeddingStore().stats()), 200
+
+@app.route('/single_flight/stats', methods=['GET'])
+def single_flight_stats_view():
+    return jsonify(single_flight_stats()), 200
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/llm/stats', methods=['GET'])
+def llm_stats():
+    return jsonify(LLMClient().stats()), 200
+
 if __name__ == '__main__':
     app.run(debug=True)
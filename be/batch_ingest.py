@@ -0,0 +1,124 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dotenv import load_dotenv
+import io
+import logging
+import multiprocessing
+import os
+import threading
+import zipfile
+from werkzeug.utils import secure_filename
+from resume_extractor import ResumeExtractor, MAX_UPLOAD_SIZE, extract_resume_data
+from gen import GenAgent
+from candidate_store import CandidateStore
+from job_queue import JobQueue
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+class BatchJob:
+    """A running batch. Its progress lives in the shared JobQueue database, so any worker can report it."""
+
+    def __init__(self, job_id, total):
+        self.id = job_id
+        self.total = total
+
+    def add_result(self, result):
+        JobQueue().add_batch_result(self.id, result)
+
+class BatchIngestor:
+    """Bulk resume ingestion.
+
+    Uploads stay in memory. Text extraction (CPU-bound PyMuPDF/python-docx)
+    runs in a process pool of INGEST_EXTRACT_WORKERS processes; each
+    extracted text is then structured by GenAgent and added to the
+    CandidateStore in a thread pool bounded by INGEST_LLM_CONCURRENCY. Per-file results are recorded in the
+    JobQueue database as soon as each file finishes, and kept for JOB_RESULT_TTL seconds once the batch is done.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        with cls._lock:
+            if cls._instance is None:
+                instance = super(BatchIngestor, cls).__new__(cls)
+                instance.max_files = int(os.getenv("INGEST_MAX_FILES", 1000))
+                # spawn keeps the workers free of the parent's model and LLM client threads.
+                instance.extract_pool = ProcessPoolExecutor(
+                    max_workers=int(os.getenv("INGEST_EXTRACT_WORKERS", os.cpu_count() or 2)),
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                instance.llm_pool = ThreadPoolExecutor(
+                    max_workers=int(os.getenv("INGEST_LLM_CONCURRENCY", 4)),
+                    thread_name_prefix="ingest-llm",
+                )
+                cls._instance = instance
+        return cls._instance
+
+    def submit(self, uploads):
+        """Start a job for werkzeug FileStorage uploads (PDF, DOCX or ZIP archives of them)."""
+        files = self._read_uploads(uploads)
+        if not files:
+            raise ValueError("No PDF or DOCX files in the upload.")
+
+        job = BatchJob(JobQueue().create_batch(len(files)), len(files))
+        for filename, data in files:
+            future = self.extract_pool.submit(extract_resume_data, data)
+            future.add_done_callback(
+                lambda f, filename=filename: self._on_extracted(job, filename, f)
+            )
+        return job
+
+    def _on_extracted(self, job, filename, future):
+        try:
+            text = future.result()
+        except Exception as e:
+            job.add_result({'filename': filename, 'status': 'error', 'stage': 'extract', 'error': str(e)})
+            return
+        if not text:
+            job.add_result({'filename': filename, 'status': 'error', 'stage': 'extract', 'error': "No text extracted"})
+            return
+        self.llm_pool.submit(self._structure, job, filename, text)
+
+    def _structure(self, job, filename, text):
+        try:
+            formated = GenAgent().generate_content(text)
+        except Exception as e:
+            job.add_result({'filename': filename, 'status': 'error', 'stage': 'llm', 'error': str(e)})
+            return
+        candidate_id = None
+        try:
+            candidate_id = CandidateStore().add(formated)
+        except Exception as e:
+            logger.exception("Could not index resume in candidate store: %s", e)
+        job.add_result({'filename': filename, 'status': 'ok', 'candidate_id': candidate_id, 'text': formated})
+
+    def _read_uploads(self, uploads):
+        """(filename, bytes) for every file, unpacking ZIP archives; formats are detected by magic bytes."""
+        files = []
+        for upload in uploads:
+            filename = secure_filename(upload.filename or '')
+            data = upload.stream.read()
+            if ResumeExtractor.detect_format(data) is None and zipfile.is_zipfile(io.BytesIO(data)):
+                files += self._read_zip(data, len(files))
+            else:
+                # Unsupported or oversized files are reported as per-file errors.
+                files.append((filename, data[:MAX_UPLOAD_SIZE + 1]))
+            if len(files) > self.max_files:
+                raise ValueError(f"Too many files, the limit is {self.max_files}.")
+        return files
+
+    def _read_zip(self, data, offset):
+        files = []
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                with archive.open(info) as member:
+                    # Never inflate more than the per-file limit.
+                    content = member.read(MAX_UPLOAD_SIZE + 1)
+                if ResumeExtractor.detect_format(content) is None:
+                    continue
+                if offset + len(files) >= self.max_files:
+                    raise ValueError(f"Too many files, the limit is {self.max_files}.")
+                files.append((secure_filename(os.path.basename(info.filename)), content))
+        return files
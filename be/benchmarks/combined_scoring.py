@@ -0,0 +1,83 @@
+"""Combined scoring: per-resume loop (combine_scores_loop) vs the vectorized combine_scores.
+
+Scores synthetic resume pools with random TF-IDF/semantic scores, checks both
+implementations return identical results and reports the best wall time.
+
+    python benchmarks/combined_scoring.py [--sizes 10000 50000 100000] [--k 50] [--output combined_scoring.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+BE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BE_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from matching import combine_scores, normalize_skill
+from reference_scoring import combine_scores_loop
+from synthetic import generate_job_description, generate_resumes
+
+def timed(fn, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def same_results(a, b):
+    if len(a) != len(b):
+        return False
+    for x, y in zip(a, b):
+        if (x['id'], x['total_score'], x['score_breakdown']) != (y['id'], y['total_score'], y['score_breakdown']):
+            return False
+        if sorted(x['matched_skills']) != sorted(y['matched_skills']) or sorted(x['missing_skills']) != sorted(y['missing_skills']):
+            return False
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 50000, 100000])
+    parser.add_argument('--k', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default='')
+    args = parser.parse_args()
+
+    jd = generate_job_description()
+    report = []
+    for size in args.sizes:
+        resumes = generate_resumes(size)
+        skill_sets = [set(normalize_skill(s) for s in r['skills']) for r in resumes]
+        rng = np.random.default_rng(size)
+        tfidf = rng.random(size)
+        semantic = rng.random(size)
+
+        rows = []
+        for k in (None, args.k):
+            loop_seconds, expected = timed(
+                lambda: combine_scores_loop(jd, resumes, tfidf, semantic, resume_skill_sets=skill_sets, k=k), args.repeat)
+            vector_seconds, actual = timed(
+                lambda: combine_scores(jd, resumes, tfidf, semantic, resume_skill_sets=skill_sets, k=k), args.repeat)
+            row = {
+                'k': k,
+                'loop_seconds': round(loop_seconds, 4),
+                'vectorized_seconds': round(vector_seconds, 4),
+                'speedup': round(loop_seconds / vector_seconds, 2),
+                'identical': same_results(expected, actual),
+            }
+            rows.append(row)
+            print(f"n={size:<7} k={str(k):<5} loop={row['loop_seconds']:>8}s  "
+                  f"vectorized={row['vectorized_seconds']:>8}s  x{row['speedup']}  identical={row['identical']}")
+        report.append({'resumes': size, 'runs': rows})
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""PDF text extraction: old string-concatenation loop vs PdfTextEngine.
+
+Uses the sample CV in be/data plus synthetic text-heavy PDFs generated with
+PyMuPDF, and reports wall time, pages extracted and the slowest page.
+
+    python benchmarks/pdf_extraction.py [--pages 50 300] [--workers 1 2 4] [--output pdf_extraction.json]
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+BE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BE_DIR)
+
+import fitz
+from pdf_engine import PdfTextEngine
+
+LINE = "Experienced engineer with ReactJS, TypeScript, NodeJS, Docker and AWS. Led a team of five developers. "
+
+def synthetic_pdf(pages):
+    doc = fitz.open()
+    for number in range(pages):
+        page = doc.new_page()
+        text = f"Page {number + 1}\n" + "\n".join(LINE for _ in range(45))
+        page.insert_textbox(fitz.Rect(36, 36, 576, 806), text, fontsize=8)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+def naive_extract(data):
+    text = ""
+    doc = fitz.open(stream=data, filetype="pdf")
+    for page in doc:
+        text += page.get_text("text") + "\n"
+    doc.close()
+    return text.strip()
+
+def timed(fn, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pages', type=int, nargs='+', default=[50, 300])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--max-chars', type=int, default=20000, help='budget for the budgeted run')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default='')
+    args = parser.parse_args()
+
+    documents = []
+    for path in sorted(glob.glob(os.path.join(BE_DIR, 'data', '*.pdf'))):
+        with open(path, 'rb') as f:
+            documents.append((os.path.basename(path), f.read()))
+    for pages in args.pages:
+        documents.append((f'synthetic_{pages}p.pdf', synthetic_pdf(pages)))
+
+    engine = PdfTextEngine()
+    report = []
+    for name, data in documents:
+        seconds, text = timed(lambda: naive_extract(data), args.repeat)
+        rows = [{'mode': 'naive_concat', 'seconds': round(seconds, 4), 'chars': len(text)}]
+        for workers in args.workers:
+            seconds, result = timed(
+                lambda: engine.extract(data, max_pages=0, max_chars=0, workers=workers), args.repeat
+            )
+            summary = result.summary()
+            rows.append({'mode': f'engine_{workers}w', 'seconds': round(seconds, 4), 'chars': len(result.text),
+                         'same_text': result.text == text, 'slowest_page': summary['slowest_page']})
+        seconds, result = timed(lambda: engine.extract(data, max_chars=args.max_chars, workers=1), args.repeat)
+        rows.append({'mode': f'engine_budget_{args.max_chars}c', 'seconds': round(seconds, 4),
+                     'chars': len(result.text), 'pages_extracted': len(result.pages), 'truncated': result.truncated})
+
+        for row in rows:
+            print(f"{name:<45} {row['mode']:<24} {row['seconds']:>8}s  chars={row['chars']}")
+        report.append({'document': name, 'pages': fitz.open(stream=data, filetype="pdf").page_count, 'runs': rows})
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Per-resume scoring loop that matching.combine_scores replaced.
+
+Kept as the reference the vectorized scoring is checked against
+(tests/test_scoring.py) and timed against (combined_scoring.py).
+"""
+import heapq
+
+from matching import normalize_skill
+
+def combine_scores_loop(job_description, resumes_data, tfidf_scores, semantic_scores, resume_skill_sets=None, k=None):
+    """Bản tính từng CV một, giữ làm chuẩn đối chiếu cho combine_scores.
+
+    `resume_skill_sets` cho phép truyền sẵn tập kỹ năng đã chuẩn hoá của từng CV.
+    Khi có `k`, chỉ k kết quả tốt nhất được chọn bằng heap thay vì sắp xếp toàn bộ.
+    """
+    # Tính toán matching score chi tiết
+    job_skills = set(normalize_skill(s) for s in job_description['required_skills'])
+    results = []
+    for i, resume in enumerate(resumes_data):
+        # Skill matching (Jaccard similarity)
+        if resume_skill_sets is not None:
+            resume_skills = resume_skill_sets[i]
+        else:
+            resume_skills = set(normalize_skill(s) for s in resume['skills'])
+        common_skills = job_skills & resume_skills
+        missing_skills = job_skills - resume_skills
+        
+        skill_match = len(common_skills) / len(job_skills) if job_skills else 0
+        
+        # Experience matching
+        required_exp = job_description.get('min_experience', 0)
+        actual_exp = len(resume['experiences'])
+        exp_match = min(actual_exp / max(required_exp, 1), 1.0)
+        
+        # Education matching
+        edu_fields = [f.lower() for f in job_description.get('education_fields', [])]
+        edu_match = 1 if resume['area_of_study'].lower() in edu_fields else 0.5
+        
+        # Combined score
+        combined_score = (
+            0.1 * tfidf_scores[i] + 
+            0.2 * semantic_scores[i] + 
+            0.45 * skill_match + 
+            0.15 * exp_match + 
+            0.1 * edu_match
+        )
+        
+        # Lưu kết quả chi tiết
+        result = {
+            'id': resume['id'] if 'id' in resume else i,
+            'applicant_name': resume['applicant_name'],
+            'total_score': round(combined_score * 100, 2),
+            'score_breakdown': {
+                'tfidf_score': round(tfidf_scores[i] * 100, 2),
+                'semantic_score': round(semantic_scores[i] * 100, 2),
+                'skill_match': round(skill_match * 100, 2),
+                'experience_match': round(exp_match * 100, 2),
+                'education_match': round(edu_match * 100, 2)
+            },
+            'matched_skills': list(common_skills),
+            'missing_skills': list(missing_skills)
+        }
+        results.append(result)
+
+    # Sắp xếp kết quả theo điểm số giảm dần
+    if k is not None:
+        return heapq.nlargest(k, results, key=lambda x: x['total_score'])
+    results.sort(key=lambda x: x['total_score'], reverse=True)
+    
+    return results
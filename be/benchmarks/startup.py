@@ -0,0 +1,130 @@
+"""Worker startup cost: app import time and per-worker memory, lazy vs preload-then-fork.
+
+* import: time/RSS to import app.py with lazy models, and with PRELOAD_MODELS=1
+  (the old behaviour, where the spaCy model loaded at import).
+* workers: a parent forks N workers that each run one semantic scoring call,
+  either loading the model themselves (lazy) or inheriting it from the parent
+  (preload + gc.freeze). Memory comes from /proc/<pid>/smaps_rollup, so this
+  part is Linux-only.
+
+    python benchmarks/startup.py [--workers 4] [--output startup.json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+BE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def memory_mb(pid='self'):
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                values[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    return {
+        'rss_mb': round(values.get('Rss', 0), 1),
+        'pss_mb': round(values.get('Pss', 0), 1),
+        'private_mb': round(values.get('Private_Clean', 0) + values.get('Private_Dirty', 0), 1),
+    }
+
+def child_import():
+    start = time.perf_counter()
+    import app  # noqa: F401
+    elapsed = time.perf_counter() - start
+    print(json.dumps({'import_seconds': round(elapsed, 3), **memory_mb()}))
+
+def child_workers(count, preload):
+    import gc
+    start = time.perf_counter()
+    import app  # noqa: F401
+    from semantic_scorer import SemanticScorer
+    parent_import = time.perf_counter() - start
+    if preload:
+        gc.freeze()
+
+    pids = []
+    read_fds = []
+    for _ in range(count):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            began = time.perf_counter()
+            SemanticScorer().score("Frontend Developer ReactJS TypeScript", ["ReactJS developer with TypeScript"] * 32)
+            first_call = time.perf_counter() - began
+            os.write(write_fd, json.dumps({'first_call_seconds': round(first_call, 3), **memory_mb()}).encode())
+            os.close(write_fd)
+            # Stay alive until the parent has read our memory figures.
+            time.sleep(2)
+            os._exit(0)
+        os.close(write_fd)
+        pids.append(pid)
+        read_fds.append(read_fd)
+
+    workers = []
+    for read_fd in read_fds:
+        chunks = []
+        while True:
+            data = os.read(read_fd, 65536)
+            if not data:
+                break
+            chunks.append(data)
+        os.close(read_fd)
+        workers.append(json.loads(b''.join(chunks)))
+    for pid in pids:
+        os.waitpid(pid, 0)
+
+    print(json.dumps({
+        'parent_import_seconds': round(parent_import, 3),
+        'parent': memory_mb(),
+        'workers': workers,
+        'total_pss_mb': round(sum(w['pss_mb'] for w in workers) + memory_mb()['pss_mb'], 1),
+    }))
+
+def run(args, env_extra):
+    env = dict(os.environ, **env_extra)
+    out = subprocess.run([sys.executable, os.path.abspath(__file__)] + args, cwd=BE_DIR,
+                         capture_output=True, text=True, check=True, env=env)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--output', default='')
+    parser.add_argument('--child', choices=['import', 'lazy', 'preload'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        sys.path.insert(0, BE_DIR)
+        if args.child == 'import':
+            child_import()
+        else:
+            child_workers(args.workers, preload=args.child == 'preload')
+        return
+
+    report = {
+        'import_lazy': run(['--child', 'import'], {'PRELOAD_MODELS': '0'}),
+        'import_eager': run(['--child', 'import'], {'PRELOAD_MODELS': '1'}),
+        'workers_lazy': run(['--child', 'lazy', '--workers', str(args.workers)], {'PRELOAD_MODELS': '0'}),
+        'workers_preload': run(['--child', 'preload', '--workers', str(args.workers)], {'PRELOAD_MODELS': '1'}),
+    }
+    for name in ('import_lazy', 'import_eager'):
+        row = report[name]
+        print(f"{name:<16} import={row['import_seconds']}s rss={row['rss_mb']} MB")
+    for name in ('workers_lazy', 'workers_preload'):
+        row = report[name]
+        first = max(w['first_call_seconds'] for w in row['workers'])
+        rss = max(w['rss_mb'] for w in row['workers'])
+        private = max(w['private_mb'] for w in row['workers'])
+        print(f"{name:<16} worker rss={rss} MB private={private} MB first_call={first}s total_pss={row['total_pss_mb']} MB")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == '__main__':
+    main()
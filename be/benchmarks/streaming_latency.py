@@ -0,0 +1,98 @@
+"""Time-to-first-token and total latency: blocking endpoints vs their SSE streams.
+
+Runs against a live server (`flask run`), so it measures what the app client sees.
+
+    python benchmarks/streaming_latency.py --url http://127.0.0.1:5000 --runs 10 [--output streaming.json]
+"""
+import argparse
+import http.client
+import json
+import statistics
+import time
+from urllib.parse import urlparse
+
+CHAT_PAYLOAD = {
+    'message': 'What skills should a frontend intern highlight when applying for a ReactJS position?',
+}
+ENHANCE_PAYLOAD = {
+    'job_description': {
+        'job_title': 'Frontend Developer',
+        'requirements': ['Proficient in ReactJS and TypeScript', 'Minimum 1 year experience',
+                         'Good English communication skills'],
+        'required_skills': ['HTML', 'CSS', 'Javascript', 'TypeScript', 'ReactJs', 'TailwindCSS', 'AWS'],
+        'min_experience': 1,
+        'education_fields': ['software engineer', 'computer science'],
+    },
+    'resume': {
+        'applicant_name': 'Applicant',
+        'institution': 'Vietnam -Korea university of information and communication technology',
+        'skills': ['HTML', 'TypeScript', 'ReactJs', 'TailwindCSS', 'MySQL', 'MongoDB', 'NodeJS'],
+        'experiences': [{'duration': '10 - 12/2022'}, {'duration': '1-2/2023'}],
+    },
+    'current_info': {
+        'highest_level_of_education': 'University',
+        'area_of_study': 'Software Engineer',
+    },
+}
+CASES = [
+    ('bot_chat', '/bot_chat', '/bot_chat/stream', CHAT_PAYLOAD),
+    ('enhance_resume', '/enhance_resume', '/enhance_resume/stream', ENHANCE_PAYLOAD),
+]
+
+def request(url, path, payload, stream):
+    parsed = urlparse(url)
+    conn_cls = http.client.HTTPSConnection if parsed.scheme == 'https' else http.client.HTTPConnection
+    conn = conn_cls(parsed.netloc, timeout=300)
+    body = json.dumps(payload)
+    start = time.perf_counter()
+    conn.request('POST', path, body=body, headers={'Content-Type': 'application/json'})
+    response = conn.getresponse()
+    first = None
+    if stream:
+        while True:
+            line = response.readline()
+            if not line:
+                break
+            if first is None and line.startswith(b'data:'):
+                first = time.perf_counter() - start
+    else:
+        response.read()
+    total = time.perf_counter() - start
+    conn.close()
+    return (first if first is not None else total), total, response.status
+
+def summarize(values):
+    values = sorted(values)
+    return {
+        'mean': round(statistics.fmean(values), 4),
+        'p50': round(values[len(values) // 2], 4),
+        'p99': round(values[min(len(values) - 1, int(len(values) * 0.99))], 4),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--output', default='')
+    args = parser.parse_args()
+
+    report = {}
+    for name, blocking_path, stream_path, payload in CASES:
+        for mode, path in (('blocking', blocking_path), ('stream', stream_path)):
+            ttfts, totals, errors = [], [], 0
+            for _ in range(args.runs):
+                ttft, total, status = request(args.url, path, payload, stream=(mode == 'stream'))
+                if status != 200:
+                    errors += 1
+                ttfts.append(ttft)
+                totals.append(total)
+            report[f'{name}.{mode}'] = {'ttft_s': summarize(ttfts), 'total_s': summarize(totals), 'errors': errors}
+            row = report[f'{name}.{mode}']
+            print(f"{name:<15} {mode:<9} ttft p50={row['ttft_s']['p50']}s  total p50={row['total_s']['p50']}s  errors={errors}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == '__main__':
+    main()
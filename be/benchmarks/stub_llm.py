@@ -0,0 +1,100 @@
+"""Deterministic local stand-in for genai.GenerativeModel.
+
+Answers depend only on the prompt: resume and JD parsing prompts get a
+synthetic resume/JD derived from a hash of the prompt, enhancement prompts
+get a few updated fields and anything else gets a chat answer. Every call
+waits `latency` seconds plus up to `jitter` seconds (also derived from the
+prompt); streamed answers then arrive in chunks `chunk_delay` seconds apart.
+
+    import stub_llm
+    stub_llm.install(latency=0.2)   # before the app (and LLMClient) is imported
+"""
+import asyncio
+import hashlib
+import json
+import time
+from types import SimpleNamespace
+
+from synthetic import generate_job_description, generate_resumes
+
+CONFIG = {'latency': 0.2, 'jitter': 0.0, 'chunk_delay': 0.01, 'chunk_size': 32}
+CALLS = {'count': 0}
+
+def prompt_text(prompt):
+    """Chat contents ([{'role', 'parts'}]) flattened to text; plain prompts unchanged."""
+    if isinstance(prompt, (list, tuple)):
+        return '\n'.join(str(part) for content in prompt for part in content['parts'])
+    return str(prompt)
+
+def prompt_seed(prompt):
+    return int(hashlib.sha256(str(prompt).encode('utf-8')).hexdigest()[:8], 16)
+
+def answer(prompt):
+    seed = prompt_seed(prompt)
+    if 'parsing job descriptions' in prompt:
+        payload = generate_job_description(seed)
+    elif 'parsing resumes' in prompt:
+        payload = generate_resumes(1, seed)[0]
+        del payload['id']
+    elif 'enhance the matching' in prompt:
+        resume = generate_resumes(1, seed)[0]
+        payload = {
+            'introduction': f"Developer with {len(resume['experiences'])} positions and a focus on {resume['skills'][0]}.",
+            'skills': resume['skills'],
+        }
+    else:
+        words = ['Highlight', 'the', 'skills', 'the', 'job', 'description', 'asks', 'for', 'first.']
+        return ' '.join(words[i % len(words)] for i in range(seed % 40 + 20))
+    return '```json\n' + json.dumps(payload, ensure_ascii=False) + '\n```'
+
+def usage(prompt, text):
+    return SimpleNamespace(prompt_token_count=len(prompt) // 4, candidates_token_count=len(text) // 4)
+
+def delay(prompt):
+    return CONFIG['latency'] + CONFIG['jitter'] * (prompt_seed(prompt) % 1000) / 1000
+
+class StubStream:
+    def __init__(self, prompt, text):
+        size = CONFIG['chunk_size']
+        self.chunks = [text[i:i + size] for i in range(0, len(text), size)]
+        self.usage = usage(prompt, text)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for i, chunk in enumerate(self.chunks):
+            if i:
+                await asyncio.sleep(CONFIG['chunk_delay'])
+            last = i == len(self.chunks) - 1
+            yield SimpleNamespace(text=chunk, usage_metadata=self.usage if last else None)
+
+class StubGenerativeModel:
+    def __init__(self, model_name=None, **kwargs):
+        self.model_name = model_name
+
+    async def generate_content_async(self, prompt, stream=False, **kwargs):
+        CALLS['count'] += 1
+        prompt = prompt_text(prompt)
+        text = answer(prompt)
+        await asyncio.sleep(delay(prompt))
+        if stream:
+            return StubStream(prompt, text)
+        return SimpleNamespace(text=text, usage_metadata=usage(prompt, text))
+
+    def generate_content(self, prompt, **kwargs):
+        CALLS['count'] += 1
+        prompt = prompt_text(prompt)
+        text = answer(prompt)
+        time.sleep(delay(prompt))
+        return SimpleNamespace(text=text, usage_metadata=usage(prompt, text))
+
+    def count_tokens(self, contents):
+        return SimpleNamespace(total_tokens=len(str(contents)) // 4)
+
+def install(latency=0.2, jitter=0.0, chunk_delay=0.01):
+    """Replace genai.GenerativeModel (and configure) with the stub."""
+    import google.generativeai as genai
+    CONFIG.update(latency=latency, jitter=jitter, chunk_delay=chunk_delay)
+    genai.GenerativeModel = StubGenerativeModel
+    genai.configure = lambda **kwargs: None
@@ -0,0 +1,268 @@
+"""Reproducible benchmark suite for be/, with a stubbed local LLM (stub_llm.py).
+
+No Gemini key is needed: genai.GenerativeModel is replaced by a deterministic
+stand-in with configurable latency. Sections, each run in a fresh subprocess
+per size/concurrency so peak RSS is not shared:
+
+* extractor: ResumeExtractor on synthetic PDF and DOCX resumes.
+* ranking: enhanced_ranking on synthetic pools, stage by stage (a new JD for
+  every repeat, so the JD parse is never a cache hit).
+* endpoints: every LLM-backed Flask endpoint (through the test client, no
+  HTTP server) under concurrent load, one unique request body per call.
+
+Every row reports count, errors, throughput, mean/p50/p99 latency and the
+peak RSS of its subprocess. --compare prints the change against an earlier
+--output file.
+
+    python benchmarks/suite.py [--sections extractor ranking endpoints] [--sizes 100 1000 10000]
+        [--concurrency 1 8 32] [--requests 64] [--llm-latency 0.2] [--output bench.json] [--compare old.json]
+
+The spaCy model comes from SPACY_MODEL as usual.
+"""
+import argparse
+import io
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BE_DIR = os.path.dirname(BENCH_DIR)
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes.
+    return rss / 1024 / 1024 if sys.platform == 'darwin' else rss / 1024
+
+def summarize(latencies, elapsed=None, errors=0):
+    values = sorted(latencies)
+    if not values:
+        return {'count': 0, 'errors': errors}
+    total = elapsed if elapsed is not None else sum(values)
+    return {
+        'count': len(values),
+        'errors': errors,
+        'throughput_per_s': round(len(values) / total, 3) if total else None,
+        'mean_s': round(statistics.fmean(values), 5),
+        'p50_s': round(values[len(values) // 2], 5),
+        'p99_s': round(values[min(len(values) - 1, int(len(values) * 0.99))], 5),
+    }
+
+def child_extractor(size, args):
+    from resume_extractor import ResumeExtractor
+    from synthetic import generate_resumes, resume_docx, resume_pdf
+
+    documents = []
+    for i, resume in enumerate(generate_resumes(size)):
+        if i % 2 == 0:
+            documents.append(('pdf', resume_pdf(resume, pages=args.pdf_pages)))
+        else:
+            documents.append(('docx', resume_docx(resume)))
+
+    extractor = ResumeExtractor()
+    latencies = {'pdf': [], 'docx': []}
+    start = time.perf_counter()
+    for file_format, data in documents:
+        began = time.perf_counter()
+        extractor.extract_resume_bytes(data)
+        latencies[file_format].append(time.perf_counter() - began)
+    elapsed = time.perf_counter() - start
+
+    rows = [{'name': 'all', **summarize(latencies['pdf'] + latencies['docx'], elapsed)}]
+    rows += [{'name': file_format, **summarize(values)} for file_format, values in latencies.items()]
+    return rows
+
+def child_ranking(size, args):
+    from matching import enhanced_ranking
+    from metrics import start_request_spans
+    from synthetic import generate_job_description, generate_resumes, job_description_text
+
+    resumes_json = json.dumps(generate_resumes(size))
+    totals = []
+    stages = {}
+    for repeat in range(args.repeat):
+        jd_text = job_description_text(generate_job_description(repeat + 1))
+        spans = start_request_spans()
+        began = time.perf_counter()
+        enhanced_ranking(jd_text, resumes_json, k=args.k)
+        totals.append(time.perf_counter() - began)
+        for stage, seconds in spans:
+            stages.setdefault(stage, []).append(seconds)
+
+    rows = [{'name': 'enhanced_ranking', **summarize(totals)}]
+    rows += [{'name': stage, **summarize(values)} for stage, values in stages.items()]
+    return rows
+
+def endpoint_cases(args):
+    from candidate_store import CandidateStore
+    from synthetic import (generate_job_description, generate_resumes, job_description_text,
+                           resume_pdf)
+
+    pool = generate_resumes(args.pool)
+    pool_json = json.dumps(pool)
+    store = CandidateStore()
+    for resume in pool:
+        store.add(resume)
+    pdfs = [resume_pdf(resume) for resume in generate_resumes(args.requests, seed=1)]
+
+    def jd_text(i):
+        return job_description_text(generate_job_description(i + 1))
+
+    def enhance_body(i):
+        return {'job_description': generate_job_description(i + 1), 'resume': generate_resumes(1, seed=i)[0],
+                'current_info': {'area_of_study': 'Software Engineer'}}
+
+    return {
+        'extract_resume': lambda i: ('/extract_resume', {
+            'data': {'resume': (io.BytesIO(pdfs[i % len(pdfs)]), f'resume_{i}.pdf')},
+            'content_type': 'multipart/form-data'}),
+        'resume_scores': lambda i: ('/resume_scores', {
+            'json': {'job_description': jd_text(i), 'resumes_data': pool_json, 'k': 20}}),
+        'rank_candidates': lambda i: ('/rank_candidates', {'json': {'job_description': jd_text(i), 'k': 20}}),
+        'enhance_resume': lambda i: ('/enhance_resume', {'json': enhance_body(i)}),
+        'enhance_resume_stream': lambda i: ('/enhance_resume/stream', {'json': enhance_body(i)}),
+        'bot_chat': lambda i: ('/bot_chat', {'json': {'message': f'Question {i}: which skills matter most?'}}),
+        'bot_chat_stream': lambda i: ('/bot_chat/stream', {'json': {'message': f'Question {i}: which skills matter most?'}}),
+    }
+
+def child_endpoints(concurrency, args):
+    import app as app_module
+    import threading
+
+    local = threading.local()
+
+    def client():
+        if not hasattr(local, 'client'):
+            local.client = app_module.app.test_client()
+        return local.client
+
+    rows = []
+    for name, case in endpoint_cases(args).items():
+        if args.endpoints and name not in args.endpoints:
+            continue
+
+        def call(i):
+            path, kwargs = case(i)
+            began = time.perf_counter()
+            response = client().post(path, **kwargs)
+            # Reading the body drains streamed responses as well.
+            body = response.get_data()
+            return time.perf_counter() - began, response.status_code != 200 or b'event: error' in body
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(call, range(args.requests)))
+        elapsed = time.perf_counter() - start
+        errors = sum(1 for _, failed in results if failed)
+        rows.append({'name': name, **summarize([latency for latency, _ in results], elapsed, errors)})
+    return rows
+
+CHILDREN = {'extractor': child_extractor, 'ranking': child_ranking, 'endpoints': child_endpoints}
+
+def run_child(section, param, args):
+    sys.path.insert(0, BE_DIR)
+    sys.path.insert(0, BENCH_DIR)
+    import stub_llm
+    stub_llm.install(latency=args.llm_latency, jitter=args.llm_jitter, chunk_delay=args.llm_chunk_delay)
+    baseline = peak_rss_mb()
+    rows = CHILDREN[section](param, args)
+    peak = round(peak_rss_mb(), 1)
+    for row in rows:
+        row['peak_rss_mb'] = peak
+        row['baseline_rss_mb'] = round(baseline, 1)
+    rows.append({'name': '_llm_calls', 'count': stub_llm.CALLS['count']})
+    print(json.dumps(rows))
+
+def child_env(workdir):
+    return dict(
+        os.environ,
+        MODEL_NAME=os.getenv('MODEL_NAME', 'stub'),
+        CANDIDATE_STORE_DIR=os.path.join(workdir, 'candidate_store'),
+        JOB_QUEUE_DB=os.path.join(workdir, 'job_queue.db'),
+        EMBEDDING_STORE_DIR=os.path.join(workdir, 'embedding_store'),
+        CHAT_SESSIONS_DB=os.path.join(workdir, 'chat_sessions.db'),
+        JD_CACHE_DB='',
+        TFIDF_MODEL_PATH='',
+        SCORING_PROFILES_PATH='',
+        LOG_LEVEL='WARNING',
+    )
+
+def compare(results, previous):
+    def key(row):
+        return (row['section'], row['param'], row['name'])
+    before = {key(row): row for row in previous['results']}
+    print('\nChange vs previous run (throughput, p50, p99, peak RSS):')
+    for row in results:
+        old = before.get(key(row))
+        if old is None or 'p50_s' not in row or 'p50_s' not in old:
+            continue
+        changes = []
+        for field in ('throughput_per_s', 'p50_s', 'p99_s', 'peak_rss_mb'):
+            if old.get(field) and row.get(field) is not None:
+                changes.append(f"{field}={(row[field] - old[field]) / old[field] * 100:+.1f}%")
+        print(f"  {row['section']:<10} {row['param']:>6} {row['name']:<36} {'  '.join(changes)}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sections', nargs='+', choices=list(CHILDREN), default=list(CHILDREN))
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000],
+                        help='documents for extractor, resumes for ranking')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--requests', type=int, default=64, help='requests per endpoint and concurrency level')
+    parser.add_argument('--endpoints', nargs='*', default=[], help='only these endpoint cases')
+    parser.add_argument('--pool', type=int, default=500, help='resumes behind the ranking endpoints')
+    parser.add_argument('--repeat', type=int, default=5, help='enhanced_ranking runs per size')
+    parser.add_argument('--k', type=int, default=None, help='top-k for the ranking section')
+    parser.add_argument('--pdf-pages', type=int, default=2)
+    parser.add_argument('--llm-latency', type=float, default=0.2)
+    parser.add_argument('--llm-jitter', type=float, default=0.0)
+    parser.add_argument('--llm-chunk-delay', type=float, default=0.01)
+    parser.add_argument('--output', default='')
+    parser.add_argument('--compare', default='')
+    parser.add_argument('--child', nargs=2, metavar=('SECTION', 'PARAM'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], int(args.child[1]), args)
+        return
+
+    forwarded = [arg for arg in sys.argv[1:]]
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for section in args.sections:
+            params = args.concurrency if section == 'endpoints' else args.sizes
+            for param in params:
+                out = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), *forwarded, '--child', section, str(param)],
+                    cwd=BE_DIR, capture_output=True, text=True, env=child_env(os.path.join(workdir, f'{section}_{param}')),
+                )
+                if out.returncode != 0:
+                    print(out.stderr, file=sys.stderr)
+                    out.check_returncode()
+                rows = json.loads(out.stdout.strip().splitlines()[-1])
+                for row in rows:
+                    row = {'section': section, 'param': param, **row}
+                    results.append(row)
+                    if 'p50_s' in row:
+                        print(f"{section:<10} {param:>6} {row['name']:<36} n={row['count']:<6} "
+                              f"{row['throughput_per_s']:>9}/s  p50={row['p50_s']:<9} p99={row['p99_s']:<9} "
+                              f"errors={row['errors']} peak={row['peak_rss_mb']} MB")
+
+    report = {
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'compare', 'child')},
+        'results': results,
+    }
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+import io
+import random
+
+SKILLS = [
+    'HTML', 'CSS', 'Javascript', 'TypeScript', 'ReactJs', 'TailwindCSS', 'MySQL', 'MongoDB',
+    'NodeJS', 'ExpressJS', 'OOP', 'English communication', 'Teamwork', 'Presentation', 'AWS',
+    'Python', 'Django', 'Flask', 'Docker', 'Kubernetes', 'Java', 'Spring Boot', 'Kotlin',
+    'Flutter', 'Dart', 'Swift', 'Go', 'Rust', 'PostgreSQL', 'Redis', 'GraphQL', 'REST API',
+    'Git', 'CI/CD', 'Linux', 'Machine Learning', 'PyTorch', 'TensorFlow', 'Pandas', 'NumPy',
+    'Figma', 'Agile', 'Scrum', 'Leadership', 'Problem solving', 'Azure', 'GCP', 'Terraform',
+]
+AREAS = ['Software Engineer', 'Computer Science', 'Information Technology', 'Data Science',
+         'Electrical Engineering', 'Business Administration', 'Mathematics']
+LEVELS = ['College', 'University', 'Master', 'PhD']
+INSTITUTIONS = ['Vietnam -Korea university of information and communication technology',
+                'Da Nang University of Science and Technology', 'Ho Chi Minh City University of Technology',
+                'Hanoi University of Science and Technology', 'FPT University']
+TITLES = ['Frontend Developer', 'Backend Developer', 'Fullstack Developer', 'Mobile Developer',
+          'Data Engineer', 'DevOps Engineer', 'Machine Learning Engineer']
+
+def generate_resumes(n, seed=0):
+    rng = random.Random(seed)
+    resumes = []
+    for i in range(n):
+        resumes.append({
+            'id': i,
+            'applicant_name': f'Applicant {i}',
+            'highest_level_of_education': rng.choice(LEVELS),
+            'area_of_study': rng.choice(AREAS),
+            'institution': rng.choice(INSTITUTIONS),
+            'introduction': '',
+            'skills': rng.sample(SKILLS, rng.randint(3, 15)),
+            'english_proficiency_level': rng.choice(['', 'B1', 'B2', 'C1', 'IELTS 6.5']),
+            'experiences': [{'duration': f'{m} months'} for m in rng.sample(range(1, 36), rng.randint(0, 5))],
+        })
+    return resumes
+
+def generate_job_description(seed=0):
+    rng = random.Random(seed)
+    skills = rng.sample(SKILLS, 12)
+    return {
+        'job_title': rng.choice(TITLES),
+        'requirements': [f'Proficient in {s}' for s in skills[:4]] + ['Good English communication skills'],
+        'min_experience': rng.randint(0, 3),
+        'education_fields': [a.lower() for a in rng.sample(AREAS, 2)],
+        'required_skills': skills,
+    }
+
+def job_description_text(jd):
+    lines = [jd['job_title'], '', 'Requirements:']
+    lines += [f'- {r}' for r in jd['requirements']]
+    lines += ['', f"Minimum {jd['min_experience']} years of experience",
+              'Education: ' + ', '.join(jd['education_fields']),
+              'Skills: ' + ', '.join(jd['required_skills'])]
+    return '\n'.join(lines)
+
+def resume_text(resume):
+    """Plain-text rendering of a synthetic resume, as it would appear in a CV file."""
+    lines = [resume['applicant_name'], '', 'EDUCATION',
+             f"{resume['highest_level_of_education']} in {resume['area_of_study']}, {resume['institution']}",
+             '', 'SKILLS'] + [f'- {s}' for s in resume['skills']]
+    if resume['english_proficiency_level']:
+        lines += ['', f"English: {resume['english_proficiency_level']}"]
+    lines += ['', 'EXPERIENCE']
+    for i, experience in enumerate(resume['experiences']):
+        lines += [f"Developer at Company {i + 1} ({experience['duration']})",
+                  'Built and maintained web applications together with a team of developers.']
+    return '\n'.join(lines)
+
+def resume_pdf(resume, pages=1):
+    import fitz
+    doc = fitz.open()
+    text = resume_text(resume)
+    for number in range(pages):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(36, 36, 576, 806), f"{text}\n\nPage {number + 1} of {pages}", fontsize=9)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+def resume_docx(resume):
+    import docx
+    document = docx.Document()
+    for line in resume_text(resume).splitlines():
+        document.add_paragraph(line)
+    out = io.BytesIO()
+    document.save(out)
+    return out.getvalue()
@@ -0,0 +1,88 @@
+"""Peak RSS of TF-IDF scoring: dense `.toarray()` path vs the sparse TfidfScorer.
+
+Each (size, mode) pair runs in a fresh subprocess so ru_maxrss is not shared.
+
+    python benchmarks/tfidf_memory.py [--sizes 100 1000 10000] [--output tfidf_memory.json]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+BE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BE_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes.
+    return rss / 1024 / 1024 if sys.platform == 'darwin' else rss / 1024
+
+def run_child(size, mode):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.metrics.pairwise import cosine_similarity
+    from tfidf_scorer import TfidfScorer
+    from synthetic import generate_resumes, generate_job_description
+
+    jd = generate_job_description()
+    job_text = f"{jd['job_title']} {' '.join(jd['requirements'])}"
+    texts = []
+    for r in generate_resumes(size):
+        texts.append(f"""
+        {r['applicant_name']}
+        Education: {r['highest_level_of_education']} in {r['area_of_study']} at {r['institution']}
+        Skills: {', '.join(r['skills'])}
+        Experience: {len(r['experiences'])} positions
+        """)
+    baseline = peak_rss_mb()
+
+    start = time.perf_counter()
+    if mode == 'dense':
+        vectors = TfidfVectorizer(stop_words="english", ngram_range=(1,2)).fit_transform([job_text] + texts).toarray()
+        scores = cosine_similarity([vectors[0]], vectors[1:])[0]
+    else:
+        scores = TfidfScorer().score(job_text, texts)
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        'size': size,
+        'mode': mode,
+        'baseline_rss_mb': round(baseline, 1),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'seconds': round(elapsed, 4),
+        'checksum': round(float(scores.sum()), 4),
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--modes', nargs='+', default=['dense', 'sparse'])
+    parser.add_argument('--output', default='')
+    parser.add_argument('--child', nargs=2, metavar=('SIZE', 'MODE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(int(args.child[0]), args.child[1])
+        return
+
+    results = []
+    for size in args.sizes:
+        for mode in args.modes:
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--child', str(size), mode],
+                capture_output=True, text=True, check=True, env=dict(os.environ, TFIDF_MODEL_PATH=''),
+            )
+            row = json.loads(out.stdout.strip().splitlines()[-1])
+            row['delta_rss_mb'] = round(row['peak_rss_mb'] - row['baseline_rss_mb'], 1)
+            results.append(row)
+            print(f"{size:>6} {mode:<6} peak={row['peak_rss_mb']:>8} MB  delta={row['delta_rss_mb']:>8} MB  {row['seconds']}s")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
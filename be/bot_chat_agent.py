@@ -1,27 +1,137 @@
-import google.generativeai as genai
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+import logging
 import os
+import threading
 import json
 import re
+from llm_client import LLMClient
+from single_flight import SingleFlight
+from prompt_builder import PromptBuilder, normalize_whitespace
+from chat_sessions import ChatSessions
+from metrics import timed
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+_instance_lock = threading.Lock()
+
 class BotChatAgent:
     _instance = None
-    
+
     prompt = """
        You are a smartest AI bot to help users answer questions and provide information about the job description and resume.
        Message is provided below and you are required to answer the question based on the message.
        if the message is not clear, ask for more information.
     """
 
+    session_prompt = """
+       You are a smartest AI bot to help users answer questions and provide information about the job description and resume.
+       The documents of this conversation are provided below; answer the user's questions based on them and on the conversation so far.
+       if a question is not clear, ask for more information.
+    """
+
+    summary_prompt = """
+       Summarize the conversation below between a user and an AI bot about a job description and resume.
+       Keep every fact, requirement, answer and open question needed to continue the conversation. Be concise.
+    """
+
     def __new__(cls):
         if cls._instance is None:
-            genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-            cls._instance = super(BotChatAgent, cls).__new__(cls)
-            cls._instance.client = genai.GenerativeModel(model_name=os.getenv("MODEL_NAME"))
+            with _instance_lock:
+                if cls._instance is None:
+                    instance = super(BotChatAgent, cls).__new__(cls)
+                    instance.client = LLMClient()
+                    instance.prompt_builder = PromptBuilder(cls.prompt, header='Message', normalize=normalize_whitespace)
+                    instance.session_builder = PromptBuilder(cls.session_prompt, header='Documents')
+                    instance.summary_builder = PromptBuilder(cls.summary_prompt, header='Conversation',
+                                                             normalize=normalize_whitespace)
+                    instance.flights = SingleFlight("BotChatAgent", instance.client, lambda response: response.text)
+                    # History past this many tokens is summarized, keeping the last messages verbatim.
+                    instance.history_budget = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", 2000))
+                    instance.keep_messages = int(os.getenv("CHAT_KEEP_MESSAGES", 4))
+                    # Summaries are stored off the LLMClient loop, so a busy chat DB never stalls Gemini calls.
+                    instance.summary_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chat-summary")
+                    cls._instance = instance
         return cls._instance
-    
-    def generate_content(self, message):
-        input_messages = self.prompt + '\nMessage:\n' + message
-        response = self.client.generate_content(input_messages)
-        return response.text
\ No newline at end of file
+
+    def start_session(self, documents):
+        """Start a chat session over `documents`, a list of (label, value) such as the JD and resume."""
+        return ChatSessions().create(self.session_builder.build(documents))
+
+    @timed("BotChatAgent.generate_content")
+    def generate_content(self, message, session=None):
+        if session is not None:
+            # Turns of one session run one at a time, in whichever worker they land.
+            with ChatSessions().turn(session.id) as session:
+                response = self.client.generate_content(self._contents(session, message))
+                return self._finish_turn(session, message, response.text)
+        input_messages = self.prompt_builder.build([(None, message)])
+        return self.flights.call(input_messages)
+
+    def stream_content(self, message, session=None):
+        """Yield the answer text chunk by chunk as the model produces it."""
+        if session is not None:
+            return self._stream_turn(message, session)
+        input_messages = self.prompt_builder.build([(None, message)])
+        return self.client.stream_content(input_messages)
+
+    def _stream_turn(self, message, session):
+        with ChatSessions().turn(session.id) as session:
+            chunks = []
+            stream = self.client.stream_content(self._contents(session, message))
+            try:
+                for chunk in stream:
+                    chunks.append(chunk)
+                    yield chunk
+            finally:
+                stream.close()
+            # An answer cut off by a disconnect never reaches the history.
+            self._finish_turn(session, message, ''.join(chunks))
+
+    @staticmethod
+    def _contents(session, message):
+        if session is None:
+            # Expired or deleted while the turn waited.
+            raise LookupError("Unknown or expired chat session")
+        return session.contents(normalize_whitespace(message))
+
+    def _finish_turn(self, session, message, answer):
+        session = ChatSessions().record(session.id, normalize_whitespace(message), answer)
+        if session is not None:
+            self._compact(session)
+        return answer
+
+    def _compact(self, session):
+        """Summarize the older history in the background once it is past the token threshold."""
+        folded = len(session.history) - self.keep_messages
+        folded -= folded % 2
+        if folded <= 0 or not self.history_budget:
+            return
+        if session.history_tokens() <= self.history_budget:
+            return
+        if not ChatSessions().begin_compaction(session):
+            return
+        transcript = '\n'.join(f"{turn['role']}: {turn['parts'][0]}" for turn in session.history[:folded])
+        prompt = self.summary_builder.build(
+            ([('Summary so far', session.summary)] if session.summary else []) + [('Messages', transcript)]
+        )
+        future = self.client.submit(prompt)
+        future.add_done_callback(
+            lambda call: self.summary_writer.submit(self._apply_summary, session.id, call, folded)
+        )
+
+    @staticmethod
+    def _apply_summary(session_id, call, folded):
+        try:
+            summary = call.result().text.strip()
+        except BaseException as e:
+            # The history stays as it is; the next turn tries again.
+            logger.warning("Chat history summary failed for session %s: %r", session_id, e)
+            ChatSessions().end_compaction(session_id)
+            return
+        try:
+            ChatSessions().apply_summary(session_id, summary, folded)
+        except Exception as e:
+            # The compaction lease expires on its own; a later turn tries again.
+            logger.warning("Could not store the chat summary for session %s: %r", session_id, e)
@@ -0,0 +1,453 @@
+from dotenv import load_dotenv
+from scipy.sparse import csr_matrix
+import numpy as np
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from gen import GenAgent
+from jd_cache import JDCache
+from matching import TOPK_PREFILTER_FACTOR, build_job_text, build_resume_text, combine_scores, normalize_skill
+from embeddings import AnnIndex, EmbeddingStore
+from skill_index import SkillIndex
+from tfidf_scorer import TfidfScorer
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+RESUME_DEFAULTS = {
+    'applicant_name': '',
+    'highest_level_of_education': '',
+    'area_of_study': '',
+    'institution': '',
+    'skills': [],
+    'experiences': [],
+}
+
+class CandidateStore:
+    """Server-side pool of featurized resumes.
+
+    Features are computed once when a resume is added: its embedding goes into
+    the EmbeddingStore (keyed by the hash of the resume text), skills are
+    stored as integer IDs (and kept in an in-memory inverted SkillIndex) and,
+    when a corpus TF-IDF vocabulary is configured, the sparse TF-IDF row is
+    stored as well. Parsed job descriptions are kept by ID so the pool can be
+    ranked without re-sending either side.
+
+    Several worker processes can share the store: writes run in BEGIN
+    IMMEDIATE transactions and append the rows they touch to a change log.
+    Before ranking, a worker that sees another connection's commit (PRAGMA
+    data_version) applies only the log entries past its watermark to its
+    in-memory skill maps and index; it reloads everything only when the log
+    (the last CANDIDATE_CHANGE_LOG entries) no longer reaches back that far.
+
+    With CANDIDATE_ANN=1, hnswlib installed and at least ANN_MIN_CANDIDATES
+    stored resumes, top-k ranking also retrieves the semantically nearest
+    candidates from an HNSW index, so good matches that share few listed
+    skills still reach scoring.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        with cls._lock:
+            if cls._instance is None:
+                instance = super(CandidateStore, cls).__new__(cls)
+                instance._setup(os.getenv("CANDIDATE_STORE_DIR", "candidate_store"))
+                cls._instance = instance
+        return cls._instance
+
+    def _setup(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(os.path.join(directory, "candidates.sqlite"), check_same_thread=False,
+                                    isolation_level=None, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS candidates (
+                row_index INTEGER PRIMARY KEY,
+                candidate_id TEXT UNIQUE NOT NULL,
+                resume TEXT NOT NULL,
+                resume_text TEXT NOT NULL,
+                skill_ids TEXT NOT NULL,
+                experience_count INTEGER NOT NULL,
+                tfidf_model TEXT,
+                tfidf_indices BLOB,
+                tfidf_values BLOB,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS skills (
+                skill_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT UNIQUE NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS job_descriptions (
+                jd_id TEXT PRIMARY KEY,
+                text TEXT NOT NULL,
+                parsed TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS candidate_changes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                row_index INTEGER NOT NULL
+            );
+        """)
+        self.change_log_size = max(int(os.getenv("CANDIDATE_CHANGE_LOG", 100000)), 1)
+        self.use_ann = os.getenv("CANDIDATE_ANN") == "1"
+        self.ann_min_candidates = int(os.getenv("ANN_MIN_CANDIDATES", 20000))
+        self._reload()
+
+    def _reload(self):
+        """Rebuild the skill maps and the SkillIndex from the database."""
+        # Read before the rows: changes committed in between are applied again later, which is harmless.
+        self.data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        self.change_seq = self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM candidate_changes").fetchone()[0]
+        self.skill_ids, self.skill_names = {}, {}
+        self.skill_seq = 0
+        self._load_skills()
+        self.ann = None
+        self.skill_index = SkillIndex()
+        for row_index, skill_ids in self.conn.execute("SELECT row_index, skill_ids FROM candidates"):
+            self.skill_index.add(row_index, json.loads(skill_ids))
+
+    def _load_skills(self):
+        """Add the skills created since the last look to the skill maps."""
+        for skill_id, name in self.conn.execute(
+            "SELECT skill_id, name FROM skills WHERE skill_id > ? ORDER BY skill_id", (self.skill_seq,)
+        ):
+            self.skill_ids[name] = skill_id
+            self.skill_names[skill_id] = name
+            self.skill_seq = skill_id
+
+    def _refresh(self):
+        """Apply the candidates other processes added, replaced or removed since the last look."""
+        with self.lock:
+            version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+            if version == self.data_version:
+                return
+            self.data_version = version
+            oldest = self.conn.execute("SELECT MIN(seq) FROM candidate_changes").fetchone()[0]
+            if oldest is not None and oldest > self.change_seq + 1:
+                # The log was trimmed past our watermark.
+                self._reload()
+                return
+            changes = self.conn.execute(
+                "SELECT seq, row_index FROM candidate_changes WHERE seq > ? ORDER BY seq", (self.change_seq,)
+            ).fetchall()
+            if not changes:
+                # Job descriptions, or our own writes.
+                return
+            self.change_seq = changes[-1][0]
+            changed = sorted(set(row_index for _, row_index in changes))
+            stored = {}
+            for start in range(0, len(changed), 900):
+                chunk = changed[start:start + 900]
+                for row_index, skill_ids, text in self.conn.execute(
+                    f"""SELECT row_index, skill_ids, resume_text
+                        FROM candidates WHERE row_index IN ({','.join('?' * len(chunk))})""",
+                    chunk,
+                ):
+                    stored[row_index] = (skill_ids, text)
+            self._load_skills()
+            for row_index in changed:
+                if row_index in stored:
+                    self.skill_index.add(row_index, json.loads(stored[row_index][0]))
+                else:
+                    self.skill_index.remove(row_index)
+                    if self.ann is not None:
+                        self.ann.remove(row_index)
+            if self.ann is not None and stored:
+                # Added (or re-added) rows replace their old vectors; the embeddings were stored by the writer.
+                self.ann.add(list(stored), EmbeddingStore().add([text for _, text in stored.values()]))
+
+    def _log_change(self, row_index):
+        """Record a changed row; call inside a write transaction. Returns its sequence number."""
+        seq = self.conn.execute("INSERT INTO candidate_changes (row_index) VALUES (?)", (row_index,)).lastrowid
+        self.conn.execute("DELETE FROM candidate_changes WHERE seq <= ?", (seq - self.change_log_size,))
+        return seq
+
+    def _advance(self, seq):
+        """Move the watermark past our own change `seq` when nothing from other processes is in between."""
+        if seq == self.change_seq + 1:
+            self.change_seq = seq
+
+    def _write(self, fn):
+        """Run `fn()` in a BEGIN IMMEDIATE transaction, rolling back if it raises."""
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn()
+                self.conn.execute("COMMIT")
+                return result
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                # Skill IDs cached during the transaction may not exist.
+                self._reload()
+                raise
+
+    # ---- candidates ----
+
+    def add(self, resume, candidate_id=None):
+        """Featurize `resume` (the GenAgent output) and upsert it into the pool."""
+        resume = {**RESUME_DEFAULTS, **resume}
+        candidate_id = str(candidate_id or resume.get('id') or uuid.uuid4())
+        resume['id'] = candidate_id
+        text = build_resume_text(resume)
+        vector = EmbeddingStore().add([text])[0]
+        tfidf_model, tfidf_indices, tfidf_values = self._tfidf_row(text)
+
+        skills = set(normalize_skill(s) for s in resume['skills'])
+
+        def write():
+            skill_ids = sorted(self._skill_id(s, create=True) for s in skills)
+            # Inside the write transaction, so no other process can take the same row.
+            row = self.conn.execute(
+                "SELECT row_index FROM candidates WHERE candidate_id = ?", (candidate_id,)
+            ).fetchone()
+            if row is None:
+                row_index = self.conn.execute("SELECT COALESCE(MAX(row_index) + 1, 0) FROM candidates").fetchone()[0]
+            else:
+                row_index = row[0]
+            self.conn.execute(
+                """INSERT OR REPLACE INTO candidates
+                   (row_index, candidate_id, resume, resume_text, skill_ids, experience_count,
+                    tfidf_model, tfidf_indices, tfidf_values, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (row_index, candidate_id, json.dumps(resume, ensure_ascii=False), text, json.dumps(skill_ids),
+                 len(resume['experiences']), tfidf_model, tfidf_indices, tfidf_values, time.time()),
+            )
+            return row_index, skill_ids, self._log_change(row_index)
+
+        with self.lock:
+            row_index, skill_ids, seq = self._write(write)
+            self._advance(seq)
+            self.skill_index.add(row_index, skill_ids)
+            if self.ann is not None:
+                self.ann.add([row_index], [vector])
+        return candidate_id
+
+    def remove(self, candidate_id):
+        def write():
+            row = self.conn.execute(
+                "SELECT row_index FROM candidates WHERE candidate_id = ?", (str(candidate_id),)
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute("DELETE FROM candidates WHERE row_index = ?", (row[0],))
+            return row[0], self._log_change(row[0])
+
+        with self.lock:
+            removed = self._write(write)
+            if removed is None:
+                return False
+            row_index, seq = removed
+            self._advance(seq)
+            self.skill_index.remove(row_index)
+            if self.ann is not None:
+                self.ann.remove(row_index)
+            return True
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM candidates").fetchone()[0]
+
+    def _skill_id(self, name, create=False):
+        """ID of a normalized skill name; with `create`, call inside a write transaction."""
+        if name in self.skill_ids:
+            return self.skill_ids[name]
+        if create:
+            # Another worker may have created it already.
+            self.conn.execute("INSERT OR IGNORE INTO skills (name) VALUES (?)", (name,))
+        row = self.conn.execute("SELECT skill_id FROM skills WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return None
+        skill_id = row[0]
+        self.skill_ids[name] = skill_id
+        self.skill_names[skill_id] = name
+        return skill_id
+
+    def _ann_index(self):
+        """The HNSW index over all stored embeddings, built on first use and updated in place; None if disabled."""
+        if not self.use_ann or len(self.skill_index) < self.ann_min_candidates:
+            return None
+        if self.ann is None:
+            if not AnnIndex.available():
+                logger.warning("CANDIDATE_ANN=1 needs the hnswlib package; ranking without the ANN index")
+                self.use_ann = False
+                return None
+            rows = self.conn.execute("SELECT row_index, resume_text FROM candidates").fetchall()
+            vectors = EmbeddingStore().add([text for _, text in rows])
+            ann = AnnIndex(vectors.shape[1], capacity=max(len(rows), 1024))
+            ann.add([row_index for row_index, _ in rows], vectors)
+            self.ann = ann
+        return self.ann
+
+    @staticmethod
+    def _tfidf_signature():
+        scorer = TfidfScorer()
+        if scorer.vectorizer is None or not scorer.model_path:
+            return None
+        return f"{scorer.model_path}:{os.path.getmtime(scorer.model_path)}"
+
+    def _tfidf_row(self, text):
+        signature = self._tfidf_signature()
+        if signature is None:
+            return None, None, None
+        row = TfidfScorer().vectorizer.transform([text]).tocsr()
+        return signature, row.indices.astype(np.int32).tobytes(), row.data.astype(np.float32).tobytes()
+
+    # ---- job descriptions ----
+
+    def save_job_description(self, text):
+        """Parse (through the JD cache) and store a job description, returning its ID."""
+        jd_id = JDCache().make_key(text)
+        parsed = JDCache().get_or_parse(text, GenAgent().generate_content2)
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO job_descriptions (jd_id, text, parsed, created_at) VALUES (?, ?, ?, ?)",
+                (jd_id, text if isinstance(text, str) else json.dumps(text, ensure_ascii=False),
+                 json.dumps(parsed, ensure_ascii=False), time.time()),
+            )
+        return jd_id, parsed
+
+    def get_job_description(self, jd_id):
+        row = self.conn.execute("SELECT parsed FROM job_descriptions WHERE jd_id = ?", (jd_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    # ---- ranking ----
+
+    def filter_rows(self, candidate_ids=None, skills=None, min_experience=None):
+        """Row indices passing the filters, or None when no filter is given."""
+        if candidate_ids is not None and not isinstance(candidate_ids, list):
+            raise ValueError("candidate_ids must be a list")
+        rows = None
+        if candidate_ids or min_experience is not None:
+            query = "SELECT row_index FROM candidates"
+            clauses, params = [], []
+            if candidate_ids:
+                candidate_ids = [str(c) for c in candidate_ids]
+                clauses.append(f"candidate_id IN ({','.join('?' * len(candidate_ids))})")
+                params += candidate_ids
+            if min_experience is not None:
+                clauses.append("experience_count >= ?")
+                params.append(int(min_experience))
+            query += " WHERE " + " AND ".join(clauses)
+            with self.lock:
+                rows = set(r[0] for r in self.conn.execute(query, params))
+        if skills:
+            wanted = set(self.skill_ids.get(normalize_skill(s)) for s in skills) - {None}
+            with_skills = self.skill_index.docs_with_any(wanted)
+            rows = with_skills if rows is None else rows & with_skills
+        return rows
+
+    def load(self, rows):
+        """Load the stored candidates for the given row indices, in row order."""
+        rows = sorted(rows)
+        candidates = []
+        with self.lock:
+            # Stay well under SQLite's bound-parameter limit.
+            for start in range(0, len(rows), 900):
+                chunk = rows[start:start + 900]
+                candidates += self.conn.execute(
+                    f"""SELECT row_index, candidate_id, resume, resume_text, tfidf_model, tfidf_indices, tfidf_values
+                        FROM candidates WHERE row_index IN ({','.join('?' * len(chunk))})""",
+                    chunk,
+                ).fetchall()
+        candidates.sort()
+        return [{
+            'row_index': row[0],
+            'candidate_id': row[1],
+            'resume': json.loads(row[2]),
+            'resume_text': row[3],
+            'tfidf_model': row[4],
+            'tfidf_indices': row[5],
+            'tfidf_values': row[6],
+        } for row in candidates]
+
+    def rank(self, job_description, candidate_ids=None, skills=None, min_experience=None, k=None, min_skill_match=0.0,
+             profile=None, profiles=None):
+        """Rank stored candidates against a parsed job description.
+
+        Candidates are first retrieved from the inverted skill index: those
+        below `min_skill_match` are dropped and, with `k`, only the
+        k * TOPK_PREFILTER_FACTOR best skill overlaps reach the TF-IDF and
+        semantic stages; with the ANN index enabled, the k * TOPK_PREFILTER_FACTOR
+        nearest candidates by embedding are added to those. The best `k`
+        results are returned, scored with `profile`, or per profile name for
+        a list of `profiles`.
+        """
+        self._refresh()
+        allowed = self.filter_rows(candidate_ids=candidate_ids, skills=skills, min_experience=min_experience)
+        job_skills = set(normalize_skill(s) for s in job_description['required_skills'])
+        job_skill_ids = [self.skill_ids[s] for s in job_skills if s in self.skill_ids]
+        limit = k * TOPK_PREFILTER_FACTOR if k is not None and TOPK_PREFILTER_FACTOR > 0 else None
+        job_text = build_job_text(job_description)
+        job_vector = EmbeddingStore().embed([job_text])[0]
+        with self.lock:
+            hits = self.skill_index.retrieve(
+                job_skill_ids, len(job_skills), min_skill_match=min_skill_match, limit=limit, doc_ids=allowed,
+            )
+            ann = self._ann_index() if limit is not None else None
+            if ann is not None:
+                hits += self._semantic_hits(ann, job_vector, limit, job_skill_ids, len(job_skills),
+                                            min_skill_match, allowed, set(doc for doc, _ in hits))
+            resume_skill_sets = {
+                doc: set(self.skill_names[i] for i in self.skill_index.skills_by_doc[doc]) for doc, _ in hits
+            }
+        candidates = self.load(resume_skill_sets)
+        if not candidates:
+            return {p.name: [] for p in profiles} if profiles else []
+
+        tfidf_scores = self._tfidf_scores(job_text, candidates)
+        # Stored when the candidates were added, so this is one matrix-vector product.
+        resume_vectors = EmbeddingStore().add([c['resume_text'] for c in candidates])
+        semantic_scores = (resume_vectors @ job_vector).astype(np.float64)
+
+        return combine_scores(
+            job_description,
+            [c['resume'] for c in candidates],
+            tfidf_scores,
+            semantic_scores,
+            resume_skill_sets=[resume_skill_sets[c['row_index']] for c in candidates],
+            k=k,
+            profile=profile,
+            profiles=profiles,
+        )
+
+    def _semantic_hits(self, ann, job_vector, limit, job_skill_ids, total_skills, min_skill_match, allowed, seen):
+        """(row, skill overlap) of the nearest candidates by embedding that pass the filters and are not in `seen`."""
+        job_skill_ids = set(job_skill_ids)
+        hits = []
+        for doc in ann.query(job_vector, limit):
+            if doc in seen or (allowed is not None and doc not in allowed):
+                continue
+            skill_ids = self.skill_index.skills_by_doc.get(doc)
+            if skill_ids is None:
+                continue
+            overlap = len(skill_ids & job_skill_ids)
+            if min_skill_match > 0 and overlap < min_skill_match * total_skills:
+                continue
+            hits.append((doc, overlap))
+        return hits
+
+    def _tfidf_scores(self, job_text, candidates):
+        signature = self._tfidf_signature()
+        if signature is None or any(c['tfidf_model'] != signature for c in candidates):
+            return TfidfScorer().score(job_text, [c['resume_text'] for c in candidates])
+
+        vectorizer = TfidfScorer().vectorizer
+        indptr = [0]
+        indices, values = [], []
+        for c in candidates:
+            row_indices = np.frombuffer(c['tfidf_indices'], dtype=np.int32)
+            indices.append(row_indices)
+            values.append(np.frombuffer(c['tfidf_values'], dtype=np.float32))
+            indptr.append(indptr[-1] + len(row_indices))
+        matrix = csr_matrix(
+            (np.concatenate(values), np.concatenate(indices), np.array(indptr)),
+            shape=(len(candidates), len(vectorizer.vocabulary_)),
+        )
+        job_row = vectorizer.transform([job_text])
+        return matrix.dot(job_row.T).toarray().ravel().astype(np.float64)
@@ -0,0 +1,308 @@
+from contextlib import contextmanager
+from dotenv import load_dotenv
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from prompt_builder import estimate_tokens
+load_dotenv()
+
+# Model turn that follows the session context, so the history alternates user/model.
+CONTEXT_ACK = "Understood. I will answer using these documents and our conversation."
+
+class ChatSession:
+    """A snapshot of one /bot_chat conversation, as read from ChatSessions.
+
+    `context` (instructions plus the attached documents) is built once when
+    the session starts. The history is kept in the SDK's chat format
+    ({'role': 'user' | 'model', 'parts': [text]}); older turns are folded
+    into `summary` by BotChatAgent once they grow past its token threshold.
+    """
+
+    def __init__(self, session_id, context, summary, history, turns, compactions, created_at, last_used):
+        self.id = session_id
+        self.context = context
+        self.summary = summary
+        self.history = history
+        self.turns = turns
+        self.compactions = compactions
+        self.created_at = created_at
+        self.last_used = last_used
+
+    def contents(self, message):
+        """The request contents for `message`: context, summary, recent history and the message."""
+        context = self.context
+        if self.summary:
+            context += f"\nSummary of the conversation so far:\n{self.summary}"
+        return [
+            {'role': 'user', 'parts': [context]},
+            {'role': 'model', 'parts': [CONTEXT_ACK]},
+            *self.history,
+            {'role': 'user', 'parts': [message]},
+        ]
+
+    def history_tokens(self):
+        return sum(estimate_tokens(part) for turn in self.history for part in turn['parts'])
+
+    def info(self):
+        return {
+            'session_id': self.id,
+            'turns': self.turns,
+            'history_messages': len(self.history),
+            'compactions': self.compactions,
+            'has_summary': bool(self.summary),
+            'context_tokens': estimate_tokens(self.context),
+            'created_at': self.created_at,
+            'last_used': self.last_used,
+        }
+
+class ChatSessions:
+    """Chat sessions in a SQLite database shared by every worker process.
+
+    Sessions are rows in CHAT_SESSIONS_DB, so a follow-up message can land on
+    any gunicorn worker. At most CHAT_MAX_SESSIONS sessions are kept (the
+    least recently used is evicted first) and sessions idle for
+    CHAT_SESSION_TTL seconds expire.
+
+    Turns of one session run one at a time across processes: a turn holds a
+    lease on the row for up to CHAT_TURN_LEASE seconds, so a turn whose
+    worker died does not block the session for good. A history compaction
+    holds a lease of its own the same way.
+    """
+    _instance = None
+    _lock = threading.Lock()
+    _COLUMNS = "session_id, context, summary, history, turns, compactions, created_at, last_used"
+
+    def __new__(cls):
+        with cls._lock:
+            if cls._instance is None:
+                instance = super(ChatSessions, cls).__new__(cls)
+                instance.db_path = os.getenv("CHAT_SESSIONS_DB", "chat_sessions.db")
+                instance.max_sessions = int(os.getenv("CHAT_MAX_SESSIONS", 1000))
+                instance.idle_ttl = float(os.getenv("CHAT_SESSION_TTL", 1800))
+                instance.turn_lease = float(os.getenv("CHAT_TURN_LEASE", 300))
+                instance.poll_interval = float(os.getenv("CHAT_POLL_INTERVAL", 0.1))
+                instance.lock = threading.Lock()
+                instance.condition = threading.Condition()
+                instance.counters = {"created": 0, "expired": 0, "evicted": 0, "deleted": 0}
+                instance.pid = None
+                instance._open()
+                cls._instance = instance
+        return cls._instance
+
+    def _open(self):
+        self.pid = os.getpid()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                context TEXT NOT NULL,
+                summary TEXT NOT NULL DEFAULT '',
+                history TEXT NOT NULL DEFAULT '[]',
+                turns INTEGER NOT NULL DEFAULT 0,
+                compactions INTEGER NOT NULL DEFAULT 0,
+                turn_token TEXT,
+                turn_expires_at REAL,
+                compaction_expires_at REAL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS sessions_last_used ON sessions (last_used);
+        """)
+
+    def _check_fork(self):
+        # The connection does not survive a fork.
+        if self.pid != os.getpid():
+            with self.lock:
+                if self.pid != os.getpid():
+                    self._open()
+
+    @contextmanager
+    def _transaction(self):
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    @staticmethod
+    def _session(row):
+        session_id, context, summary, history, turns, compactions, created_at, last_used = row
+        return ChatSession(session_id, context, summary, json.loads(history), turns, compactions, created_at, last_used)
+
+    def create(self, context):
+        self._check_fork()
+        now = time.time()
+        session_id = uuid.uuid4().hex
+        with self._transaction() as conn:
+            self._expire(conn, now)
+            conn.execute(
+                "INSERT INTO sessions (session_id, context, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (session_id, context, now, now),
+            )
+            evicted = conn.execute(
+                "DELETE FROM sessions WHERE session_id IN "
+                "(SELECT session_id FROM sessions ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_sessions,),
+            ).rowcount
+            self.counters["created"] += 1
+            self.counters["evicted"] += evicted
+        return ChatSession(session_id, context, '', [], 0, 0, now, now)
+
+    def get(self, session_id):
+        """The live session with this ID (marked as just used), or None."""
+        self._check_fork()
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                f"SELECT {self._COLUMNS} FROM sessions WHERE session_id = ? AND last_used > ?",
+                (session_id, now - self.idle_ttl),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE sessions SET last_used = ? WHERE session_id = ?", (now, session_id))
+        session = self._session(row)
+        session.last_used = now
+        return session
+
+    def delete(self, session_id):
+        self._check_fork()
+        with self.lock:
+            if not self.conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,)).rowcount:
+                return False
+            self.counters["deleted"] += 1
+            return True
+
+    # ---- turns ----
+
+    def _try_acquire_turn(self, session_id):
+        """A token for the turn lease of the session, None while another turn holds it.
+
+        Raises LookupError once the session is gone.
+        """
+        self._check_fork()
+        token = uuid.uuid4().hex
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT turn_expires_at FROM sessions WHERE session_id = ? AND last_used > ?",
+                (session_id, now - self.idle_ttl),
+            ).fetchone()
+            if row is None:
+                raise LookupError("Unknown or expired chat session")
+            if row[0] is not None and row[0] > now:
+                return None
+            conn.execute(
+                "UPDATE sessions SET turn_token = ?, turn_expires_at = ?, last_used = ? WHERE session_id = ?",
+                (token, now + self.turn_lease, now, session_id),
+            )
+        return token
+
+    def acquire_turn(self, session_id):
+        """Wait for the turn lease of the session and return its token."""
+        while True:
+            token = self._try_acquire_turn(session_id)
+            if token is not None:
+                return token
+            # Turns finished by other processes are only seen by polling.
+            with self.condition:
+                self.condition.wait(self.poll_interval)
+
+    def release_turn(self, session_id, token):
+        self._check_fork()
+        with self.lock:
+            self.conn.execute(
+                "UPDATE sessions SET turn_token = NULL, turn_expires_at = NULL WHERE session_id = ? AND turn_token = ?",
+                (session_id, token),
+            )
+        with self.condition:
+            self.condition.notify_all()
+
+    @contextmanager
+    def turn(self, session_id):
+        """Hold the turn lease of the session for the `with` block; yields the current session."""
+        token = self.acquire_turn(session_id)
+        try:
+            yield self.get(session_id)
+        finally:
+            self.release_turn(session_id, token)
+
+    def record(self, session_id, message, answer):
+        """Append a turn to the history; returns the updated session, or None if it is gone."""
+        self._check_fork()
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(f"SELECT {self._COLUMNS} FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            if row is None:
+                return None
+            session = self._session(row)
+            session.history += [{'role': 'user', 'parts': [message]}, {'role': 'model', 'parts': [answer]}]
+            session.turns += 1
+            session.last_used = now
+            conn.execute(
+                "UPDATE sessions SET history = ?, turns = ?, last_used = ? WHERE session_id = ?",
+                (json.dumps(session.history, ensure_ascii=False), session.turns, now, session_id),
+            )
+        return session
+
+    # ---- compaction ----
+
+    def begin_compaction(self, session):
+        """Claim the compaction of `session` (a snapshot); False if it is claimed or was compacted since."""
+        self._check_fork()
+        now = time.time()
+        with self.lock:
+            return bool(self.conn.execute(
+                "UPDATE sessions SET compaction_expires_at = ? WHERE session_id = ? AND compactions = ? "
+                "AND (compaction_expires_at IS NULL OR compaction_expires_at < ?)",
+                (now + self.turn_lease, session.id, session.compactions, now),
+            ).rowcount)
+
+    def apply_summary(self, session_id, summary, folded):
+        """Replace the first `folded` history entries (already summarized) with `summary`."""
+        self._check_fork()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT history FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            if row is None:
+                return
+            # Turns are only ever appended, so the summarized entries are still the first ones.
+            history = json.loads(row[0])[folded:]
+            conn.execute(
+                "UPDATE sessions SET summary = ?, history = ?, compactions = compactions + 1, "
+                "compaction_expires_at = NULL WHERE session_id = ?",
+                (summary, json.dumps(history, ensure_ascii=False), session_id),
+            )
+
+    def end_compaction(self, session_id):
+        """Give up a claimed compaction; the next turn tries again."""
+        self._check_fork()
+        with self.lock:
+            self.conn.execute("UPDATE sessions SET compaction_expires_at = NULL WHERE session_id = ?", (session_id,))
+
+    def _expire(self, conn, now):
+        self.counters["expired"] += conn.execute(
+            "DELETE FROM sessions WHERE last_used <= ?", (now - self.idle_ttl,)
+        ).rowcount
+
+    def stats(self):
+        self._check_fork()
+        with self._transaction() as conn:
+            self._expire(conn, time.time())
+            rows = conn.execute("SELECT turns, compactions, history FROM sessions").fetchall()
+            counters = dict(self.counters)
+        return {
+            **counters,
+            "active": len(rows),
+            "max_sessions": self.max_sessions,
+            "turns": sum(turns for turns, _, _ in rows),
+            "compactions": sum(compactions for _, compactions, _ in rows),
+            "history_tokens": sum(
+                estimate_tokens(part) for _, _, history in rows for turn in json.loads(history) for part in turn['parts']
+            ),
+        }
@@ -0,0 +1,325 @@
+from collections import OrderedDict
+from dotenv import load_dotenv
+import hashlib
+import logging
+import numpy as np
+import os
+import re
+import sqlite3
+import threading
+from semantic_scorer import SemanticScorer, get_nlp
+load_dotenv()
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "spacy")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+
+class SpacyEmbedder:
+    """Averaged spaCy word vectors, the signal Doc.similarity compares."""
+
+    def __init__(self):
+        get_nlp()
+
+    @property
+    def dim(self):
+        return get_nlp().vocab.vectors_length
+
+    def encode(self, texts):
+        return SemanticScorer().doc_vectors(texts)
+
+class SentenceTransformerEmbedder:
+    """A local sentence-embedding model run on CPU (optional sentence-transformers dependency)."""
+
+    def __init__(self):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise RuntimeError(
+                "EMBEDDING_BACKEND=sentence-transformers needs the sentence-transformers package"
+            ) from e
+        self.model = SentenceTransformer(EMBEDDING_MODEL, device=os.getenv("EMBEDDING_DEVICE", "cpu"))
+        self.batch_size = int(os.getenv("EMBEDDING_BATCH_SIZE", 32))
+
+    @property
+    def dim(self):
+        return self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts):
+        return self.model.encode(list(texts), batch_size=self.batch_size, convert_to_numpy=True,
+                                 show_progress_bar=False)
+
+BACKENDS = {
+    "spacy": SpacyEmbedder,
+    "sentence-transformers": SentenceTransformerEmbedder,
+}
+
+_embedder = None
+_embedder_lock = threading.Lock()
+
+def get_embedder():
+    """Load the EMBEDDING_BACKEND model on first use; safe to call from several threads."""
+    global _embedder
+    if _embedder is None:
+        with _embedder_lock:
+            if _embedder is None:
+                if EMBEDDING_BACKEND not in BACKENDS:
+                    raise ValueError(f"Unknown EMBEDDING_BACKEND {EMBEDDING_BACKEND!r}, expected one of {sorted(BACKENDS)}")
+                _embedder = BACKENDS[EMBEDDING_BACKEND]()
+    return _embedder
+
+def backend_name():
+    """Identifies the embedding space; vectors of different backends or models are never mixed."""
+    if EMBEDDING_BACKEND == "spacy":
+        model = os.getenv("SPACY_MODEL", "en_core_web_lg")
+    else:
+        model = EMBEDDING_MODEL
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', f"{EMBEDDING_BACKEND}-{os.path.basename(model.rstrip('/'))}")
+
+def normalize_rows(vectors):
+    """L2-normalize rows so a dot product is the cosine; rows without any vector stay zero."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+class EmbeddingStore:
+    """Text embeddings cached by content hash.
+
+    Only texts passed to `add` (resumes, at extraction/ingest time) are
+    persisted: their L2-normalized embeddings are float16 rows of a
+    memory-mapped .npy file in EMBEDDING_STORE_DIR/<backend>, with a SQLite
+    table mapping the SHA-256 of each text to its row, so they are never
+    embedded again. Other texts (job descriptions, ad-hoc resume pools) are
+    only kept in a bounded in-memory LRU of EMBEDDING_CACHE_SIZE entries.
+    Cosine similarity to a query is a single matrix-vector product over the
+    rows. With EMBEDDING_STORE_DIR="" nothing is persisted.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        with cls._lock:
+            if cls._instance is None:
+                instance = super(EmbeddingStore, cls).__new__(cls)
+                instance.lock = threading.RLock()
+                instance.counters = {"hits": 0, "misses": 0}
+                instance.cache_size = int(os.getenv("EMBEDDING_CACHE_SIZE", 1024))
+                instance.recent = OrderedDict()
+                instance.directory = os.getenv("EMBEDDING_STORE_DIR", "embedding_store")
+                instance.conn = None
+                instance.rows = {}
+                if instance.directory:
+                    instance._setup(os.path.join(instance.directory, backend_name()))
+                cls._instance = instance
+        return cls._instance
+
+    def _setup(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.vectors_path = os.path.join(directory, "vectors.npy")
+        self.conn = sqlite3.connect(os.path.join(directory, "embeddings.sqlite"), check_same_thread=False,
+                                    isolation_level=None, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                content_hash TEXT PRIMARY KEY,
+                row_index INTEGER UNIQUE NOT NULL
+            )
+        """)
+        self.rows = dict(self.conn.execute("SELECT content_hash, row_index FROM embeddings"))
+        self.vectors = None
+        self.vectors_inode = None
+        self._refresh()
+
+    @staticmethod
+    def content_hash(text):
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def embed(self, texts):
+        """Normalized float32 embeddings of `texts`, one row per text, without persisting any.
+
+        Stored texts are read from the store, recently seen ones from the
+        in-memory LRU; only the rest are computed.
+        """
+        if not texts:
+            return np.zeros((0, get_embedder().dim), dtype=np.float32)
+        hashes = [self.content_hash(text) for text in texts]
+        with self.lock:
+            if self.conn is not None:
+                self._lookup(hashes)
+                self._refresh()
+            stored, rows, vectors, missing = [], [], {}, []
+            for i, h in enumerate(hashes):
+                if h in self.rows:
+                    stored.append(i)
+                    rows.append(self.rows[h])
+                elif h in self.recent:
+                    self.recent.move_to_end(h)
+                    vectors[h] = self.recent[h]
+                elif h not in vectors:
+                    vectors[h] = None
+                    missing.append(h)
+            stored_vectors = self.vectors[rows].astype(np.float32) if stored else None
+        if missing:
+            # Embed outside the lock; concurrent requests are not serialized behind the model.
+            text_by_hash = dict(zip(hashes, texts))
+            computed = normalize_rows(get_embedder().encode([text_by_hash[h] for h in missing]))
+            vectors.update(zip(missing, computed))
+        with self.lock:
+            self.counters["hits"] += len(hashes) - len(missing)
+            self.counters["misses"] += len(missing)
+            for h in missing[-self.cache_size:] if self.cache_size > 0 else []:
+                self.recent[h] = vectors[h]
+            while len(self.recent) > self.cache_size:
+                self.recent.popitem(last=False)
+
+        dim = stored_vectors.shape[1] if stored else len(next(iter(vectors.values())))
+        result = np.empty((len(hashes), dim), dtype=np.float32)
+        if stored:
+            result[stored] = stored_vectors
+        for i, h in enumerate(hashes):
+            if h in vectors:
+                result[i] = vectors[h]
+        return result
+
+    def add(self, texts):
+        """Embed and persist `texts` (resumes, at extraction/ingest time) and return their embeddings."""
+        if self.conn is not None and texts:
+            hashes = [self.content_hash(text) for text in texts]
+            with self.lock:
+                missing = self._lookup(hashes)
+            if missing:
+                text_by_hash = dict(zip(hashes, texts))
+                self._append(missing, normalize_rows(get_embedder().encode([text_by_hash[h] for h in missing])))
+                with self.lock:
+                    self.counters["misses"] += len(missing)
+        return self.embed(texts)
+
+    def similarity(self, query_text, texts):
+        """Cosine similarity between `query_text` and every text, 0 for texts without a vector."""
+        if not texts:
+            return np.zeros(0)
+        query = self.embed([query_text])[0]
+        return (self.embed(texts) @ query).astype(np.float64)
+
+    def stats(self):
+        with self.lock:
+            return {"backend": backend_name(), "rows": len(self), "cached": len(self.recent), **self.counters}
+
+    def _lookup(self, hashes):
+        """Distinct hashes without a stored row, after checking rows added by other processes."""
+        missing = list(dict.fromkeys(h for h in hashes if h not in self.rows))
+        # Stay well under SQLite's bound-parameter limit.
+        for start in range(0, len(missing), 900):
+            chunk = missing[start:start + 900]
+            self.rows.update(self.conn.execute(
+                f"SELECT content_hash, row_index FROM embeddings WHERE content_hash IN ({','.join('?' * len(chunk))})",
+                chunk,
+            ))
+        return [h for h in missing if h not in self.rows]
+
+    def _append(self, hashes, vectors):
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._refresh()
+                next_row = self.conn.execute("SELECT COALESCE(MAX(row_index) + 1, 0) FROM embeddings").fetchone()[0]
+                added = []
+                for content_hash, vector in zip(hashes, vectors):
+                    if self.conn.execute("SELECT 1 FROM embeddings WHERE content_hash = ?", (content_hash,)).fetchone():
+                        continue
+                    if self.vectors is None or self.vectors.shape[0] <= next_row:
+                        self._grow(next_row + 1, len(vector))
+                    self.vectors[next_row] = vector
+                    added.append((content_hash, next_row))
+                    next_row += 1
+                if added:
+                    self.vectors.flush()
+                    self.conn.executemany("INSERT INTO embeddings (content_hash, row_index) VALUES (?, ?)", added)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            self._lookup(hashes)
+
+    def _refresh(self):
+        """Remap the vectors file if it was grown (replaced), possibly by another process."""
+        try:
+            inode = os.stat(self.vectors_path).st_ino
+        except FileNotFoundError:
+            return
+        if inode != self.vectors_inode:
+            self.vectors = np.load(self.vectors_path, mmap_mode="r+")
+            self.vectors_inode = inode
+
+    def _grow(self, min_rows, dim):
+        old = self.vectors
+        capacity = max(min_rows, 1024, 2 * (old.shape[0] if old is not None else 0))
+        tmp_path = self.vectors_path + ".tmp"
+        grown = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float16, shape=(capacity, dim))
+        if old is not None:
+            grown[:old.shape[0]] = old
+        grown.flush()
+        del grown
+        self.vectors = None
+        del old
+        os.replace(tmp_path, self.vectors_path)
+        self._refresh()
+
+class AnnIndex:
+    """Approximate nearest-neighbour index (HNSW, inner product) over normalized embeddings.
+
+    Needs the optional hnswlib package; `available()` is False without it.
+    Labels are caller-chosen integers (candidate rows).
+    """
+
+    def __init__(self, dim, capacity=1024):
+        self.index = hnswlib.Index(space="ip", dim=dim)
+        self.index.init_index(
+            max_elements=capacity,
+            ef_construction=int(os.getenv("ANN_EF_CONSTRUCTION", 200)),
+            M=int(os.getenv("ANN_M", 16)),
+        )
+        self.ef = int(os.getenv("ANN_EF", 128))
+        self.labels = set()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def available():
+        return hnswlib is not None
+
+    def __len__(self):
+        return len(self.labels)
+
+    def add(self, labels, vectors):
+        if not len(labels):
+            return
+        with self.lock:
+            needed = self.index.get_current_count() + len(labels)
+            if needed > self.index.get_max_elements():
+                self.index.resize_index(max(needed, 2 * self.index.get_max_elements()))
+            self.index.add_items(np.asarray(vectors, dtype=np.float32), np.asarray(labels))
+            self.labels.update(int(label) for label in labels)
+
+    def remove(self, label):
+        with self.lock:
+            if label in self.labels:
+                self.index.mark_deleted(label)
+                self.labels.discard(label)
+
+    def query(self, vector, k):
+        """Labels of (about) the `k` nearest items, best first."""
+        with self.lock:
+            k = min(k, len(self.labels))
+            if k == 0:
+                return []
+            self.index.set_ef(max(self.ef, k))
+            labels, _ = self.index.knn_query(np.asarray(vector, dtype=np.float32).reshape(1, -1), k=k)
+        return [int(label) for label in labels[0]]
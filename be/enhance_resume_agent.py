@@ -1,13 +1,20 @@
-import google.generativeai as genai
 from dotenv import load_dotenv
-from copy import deepcopy
 import os
+import threading
 import json
 import re
 from resume_extractor import ResumeExtractor
 from gen import GenAgent
+from llm_client import LLMClient
+from json_stream import JSONFieldStream
+from scoring_profiles import ScoringProfiles
+from single_flight import SingleFlight
+from prompt_builder import PromptBuilder
+from metrics import timed
 load_dotenv()
 
+_instance_lock = threading.Lock()
+
 class EnhancedRankingAgent:
     _instance = None
     
@@ -27,28 +34,45 @@ class EnhancedRankingAgent:
 
     def __new__(cls):
         if cls._instance is None:
-            genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-            cls._instance = super(EnhancedRankingAgent, cls).__new__(cls)
-            cls._instance.client = genai.GenerativeModel(model_name=os.getenv("MODEL_NAME"))
+            with _instance_lock:
+                if cls._instance is None:
+                    instance = super(EnhancedRankingAgent, cls).__new__(cls)
+                    instance.client = LLMClient()
+                    instance.prompt_builder = PromptBuilder(cls.prompt)
+                    instance.flights = SingleFlight("EnhancedRankingAgent", instance.client, lambda response: instance.postprocess(response.text))
+                    cls._instance = instance
         return cls._instance
     
-    def generate_content(self, job_description, resume, current_info, weights):
-        weights = {
-            'tfidf_score': 0.1,
-            'semantic_score': 0.2,
-            'skill_match': 0.45,
-            'experience_match': 0.15,
-            'education_match': 0.1
-        }
-        messages = deepcopy(f"""
-                'job_description': {job_description},
-                'resume': {resume},
-                'current_info': {current_info},
-                'weights': {weights}
-        """)
-        input_messages = self.prompt + '\nInput data:\n' + messages
-        response = self.client.generate_content(input_messages)
-        return self.postprocess(response.text)
+    @timed("EnhancedRankingAgent.generate_content")
+    def generate_content(self, job_description, resume, current_info, weights=None, profile=None):
+        input_messages = self.build_input(job_description, resume, current_info, weights, profile)
+        return self.flights.call(input_messages)
+
+    def stream_content(self, job_description, resume, current_info, weights=None, profile=None):
+        """Yield (field, value) pairs of the enhanced resume as soon as each one is complete."""
+        input_messages = self.build_input(job_description, resume, current_info, weights, profile)
+        fields = JSONFieldStream()
+        chunks = self.client.stream_content(input_messages)
+        try:
+            for chunk in chunks:
+                yield from fields.feed(chunk)
+        finally:
+            chunks.close()
+        if not fields.finished:
+            # Fall back to the regular parser for output the field stream could not follow.
+            for key, value in self.postprocess(fields.buffer).items():
+                if key not in fields.fields:
+                    yield key, value
+
+    def build_input(self, job_description, resume, current_info, weights=None, profile=None):
+        # Same weights as /resume_scores: a named profile, inline weights or "default".
+        weights = ScoringProfiles().resolve(profile, weights).weights
+        return self.prompt_builder.build([
+            ('job_description', job_description),
+            ('resume', resume),
+            ('current_info', current_info),
+            ('weights', weights),
+        ])
         
     def postprocess(self,output):
         match = re.search(r'\{.*\}', output, re.DOTALL)
@@ -1,12 +1,17 @@
-import google.generativeai as genai
 from dotenv import load_dotenv
-from copy import deepcopy
 import os
+import threading
 import json
 import re
 from resume_extractor import ResumeExtractor
+from llm_client import LLMClient
+from single_flight import SingleFlight
+from prompt_builder import PromptBuilder
+from metrics import timed
 load_dotenv()
 
+_instance_lock = threading.Lock()
+
 class GenAgent:
     _instance = None
     
@@ -43,22 +48,26 @@ class GenAgent:
 
     def __new__(cls):
         if cls._instance is None:
-            genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-            cls._instance = super(GenAgent, cls).__new__(cls)
-            cls._instance.client = genai.GenerativeModel(model_name=os.getenv("MODEL_NAME"))
+            with _instance_lock:
+                if cls._instance is None:
+                    instance = super(GenAgent, cls).__new__(cls)
+                    instance.client = LLMClient()
+                    instance.resume_prompt = PromptBuilder(cls.prompt)
+                    instance.jd_prompt = PromptBuilder(cls.prompt2)
+                    # Identical concurrent prompts (e.g. one JD parsed by many requests) share one call.
+                    instance.flights = SingleFlight("GenAgent", instance.client, lambda response: instance.postprocess(response.text))
+                    cls._instance = instance
         return cls._instance
     
+    @timed("GenAgent.generate_content")
     def generate_content(self, messages):
-        messages = deepcopy(messages)
-        input_messages = self.prompt + '\nInput data:\n' + messages
-        response = self.client.generate_content(input_messages)
-        return self.postprocess(response.text)
+        input_messages = self.resume_prompt.build([(None, messages)])
+        return self.flights.call(input_messages)
     
+    @timed("GenAgent.generate_content2")
     def generate_content2(self, messages):
-        messages = deepcopy(messages)
-        input_messages = self.prompt2 + '\nInput data:\n' + messages
-        response = self.client.generate_content(input_messages)
-        return self.postprocess(response.text)
+        input_messages = self.jd_prompt.build([(None, messages)])
+        return self.flights.call(input_messages)
     
     def postprocess(self,output):
         match = re.search(r'\{.*\}', output, re.DOTALL)
@@ -0,0 +1,19 @@
+import gc
+import os
+
+# PRELOAD_MODELS=1 gunicorn -c gunicorn.conf.py app:app
+#
+# With preloading, the app (and the spaCy model, see app.py) is imported once
+# in the master and workers are forked from it, sharing the model pages
+# copy-on-write instead of each loading its own copy.
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", 2))
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 120))
+preload_app = os.getenv("PRELOAD_MODELS") == "1"
+
+def when_ready(server):
+    # Move everything loaded so far out of the collector's reach, so GC passes
+    # in the workers do not write to (and un-share) the preloaded objects.
+    if preload_app:
+        gc.freeze()
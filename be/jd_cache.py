@@ -0,0 +1,155 @@
+from dotenv import load_dotenv
+from collections import OrderedDict
+from copy import deepcopy
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+load_dotenv()
+
+class JDCache:
+    """Cache parsed job descriptions by a hash of the normalized JD text.
+
+    Lookups go through a bounded in-memory LRU first and then, if JD_CACHE_DB
+    is set, through a SQLite store with TTL and size-based eviction.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        with cls._lock:
+            if cls._instance is None:
+                instance = super(JDCache, cls).__new__(cls)
+                instance.max_size = int(os.getenv("JD_CACHE_SIZE", 256))
+                instance.db_path = os.getenv("JD_CACHE_DB", "")
+                instance.ttl = float(os.getenv("JD_CACHE_TTL", 7 * 24 * 3600))
+                instance.max_rows = int(os.getenv("JD_CACHE_MAX_ROWS", 10000))
+                instance.lock = threading.Lock()
+                instance.memory = OrderedDict()
+                instance.counters = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+                instance.conn = None
+                if instance.db_path:
+                    instance._open_db()
+                cls._instance = instance
+        return cls._instance
+
+    def _open_db(self):
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS jd_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS jd_cache_accessed ON jd_cache (accessed_at)")
+        self.conn.commit()
+
+    @staticmethod
+    def normalize(jd_text):
+        if not isinstance(jd_text, str):
+            jd_text = json.dumps(jd_text, sort_keys=True, ensure_ascii=False)
+        return re.sub(r'\s+', ' ', jd_text).strip()
+
+    def make_key(self, jd_text):
+        return hashlib.sha256(self.normalize(jd_text).encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.counters["hits"] += 1
+                return deepcopy(self.memory[key])
+
+            value = self._disk_get(key)
+            if value is not None:
+                self.counters["hits"] += 1
+                self.counters["disk_hits"] += 1
+                self._memory_set(key, value)
+                return deepcopy(value)
+
+            self.counters["misses"] += 1
+            return None
+
+    def set(self, key, value):
+        with self.lock:
+            self._memory_set(key, deepcopy(value))
+            self._disk_set(key, value)
+
+    def get_or_parse(self, jd_text, parse_fn):
+        """Return the parsed JD for `jd_text`, calling `parse_fn` only on a miss."""
+        key = self.make_key(jd_text)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        parsed = parse_fn(jd_text)
+        self.set(key, parsed)
+        return deepcopy(parsed)
+
+    def stats(self):
+        with self.lock:
+            total = self.counters["hits"] + self.counters["misses"]
+            stats = dict(self.counters)
+            stats["hit_ratio"] = round(self.counters["hits"] / total, 4) if total else 0.0
+            stats["memory_entries"] = len(self.memory)
+            stats["memory_max_size"] = self.max_size
+            stats["disk_entries"] = self._disk_count()
+            return stats
+
+    def clear(self):
+        with self.lock:
+            self.memory.clear()
+            if self.conn is not None:
+                self.conn.execute("DELETE FROM jd_cache")
+                self.conn.commit()
+
+    def _memory_set(self, key, value):
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_size:
+            self.memory.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def _disk_get(self, key):
+        if self.conn is None:
+            return None
+        row = self.conn.execute(
+            "SELECT value, created_at FROM jd_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if now - row[1] > self.ttl:
+            self.conn.execute("DELETE FROM jd_cache WHERE key = ?", (key,))
+            self.conn.commit()
+            return None
+        self.conn.execute("UPDATE jd_cache SET accessed_at = ? WHERE key = ?", (now, key))
+        self.conn.commit()
+        return json.loads(row[0])
+
+    def _disk_set(self, key, value):
+        if self.conn is None:
+            return
+        now = time.time()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO jd_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(value, ensure_ascii=False), now, now),
+        )
+        self.conn.execute("DELETE FROM jd_cache WHERE created_at < ?", (now - self.ttl,))
+        overflow = self._disk_count() - self.max_rows
+        if overflow > 0:
+            self.conn.execute(
+                "DELETE FROM jd_cache WHERE key IN (SELECT key FROM jd_cache ORDER BY accessed_at ASC LIMIT ?)",
+                (overflow,),
+            )
+            self.counters["evictions"] += overflow
+        self.conn.commit()
+
+    def _disk_count(self):
+        if self.conn is None:
+            return 0
+        return self.conn.execute("SELECT COUNT(*) FROM jd_cache").fetchone()[0]
@@ -0,0 +1,368 @@
+from dotenv import load_dotenv
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+class JobFailed(Exception):
+    """Raised by handlers to fail a job with a specific HTTP-style error code."""
+
+    def __init__(self, message, code=500):
+        super().__init__(message)
+        self.code = code
+
+class JobQueue:
+    """SQLite-backed queue for LLM-heavy requests, run by a local worker pool.
+
+    Jobs are rows in JOB_QUEUE_DB and are claimed by JOB_WORKERS threads in
+    priority order (higher first, then oldest). Submitting a job identical to
+    one still queued or running returns the existing job instead. Claimed jobs
+    hold a lease of JOB_LEASE seconds, so a job whose worker died is picked up
+    again. Finished jobs are kept for JOB_RESULT_TTL seconds.
+
+    Every process serving the app shares the database, so a job can be
+    submitted and polled through different gunicorn workers. The same holds
+    for the progress of bulk ingestion batches (create_batch /
+    add_batch_result / get_batch), which run in the process that accepted
+    them.
+    """
+    _instance = None
+    _lock = threading.Lock()
+    handlers = {}
+
+    def __new__(cls):
+        with cls._lock:
+            if cls._instance is None:
+                instance = super(JobQueue, cls).__new__(cls)
+                instance.db_path = os.getenv("JOB_QUEUE_DB", "job_queue.db")
+                instance.worker_count = int(os.getenv("JOB_WORKERS", 4))
+                instance.lease = float(os.getenv("JOB_LEASE", 600))
+                instance.result_ttl = float(os.getenv("JOB_RESULT_TTL", 3600))
+                instance.poll_interval = float(os.getenv("JOB_POLL_INTERVAL", 0.5))
+                instance.lock = threading.Lock()
+                instance.condition = threading.Condition()
+                instance.counters = {"submitted": 0, "deduplicated": 0, "completed": 0, "failed": 0}
+                instance.pid = None
+                instance._open()
+                cls._instance = instance
+        return cls._instance
+
+    def _open(self):
+        self.pid = os.getpid()
+        self.threads = []
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                dedup_key TEXT NOT NULL,
+                priority INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                data BLOB,
+                result TEXT,
+                error TEXT,
+                error_code INTEGER,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                lease_expires_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_pending ON jobs (status, priority DESC, created_at);
+            CREATE INDEX IF NOT EXISTS jobs_dedup ON jobs (dedup_key, status);
+            CREATE TABLE IF NOT EXISTS batches (
+                batch_id TEXT PRIMARY KEY,
+                total INTEGER NOT NULL,
+                completed INTEGER NOT NULL DEFAULT 0,
+                errors INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                finished_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS batch_results (
+                batch_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                result TEXT NOT NULL,
+                PRIMARY KEY (batch_id, seq)
+            );
+        """)
+
+    def _check_fork(self):
+        # The connection and worker threads do not survive a fork.
+        if self.pid != os.getpid():
+            with self.lock:
+                if self.pid != os.getpid():
+                    self._open()
+
+    @classmethod
+    def register(cls, kind, handler):
+        """`handler(payload, data)` runs a job and returns its JSON-serializable result.
+
+        Registering does not open the queue; workers start with the first job
+        request served by the process.
+        """
+        cls.handlers[kind] = handler
+
+    def ensure_workers(self):
+        self._check_fork()
+        with self.lock:
+            self.threads = [t for t in self.threads if t.is_alive()]
+            while len(self.threads) < self.worker_count:
+                thread = threading.Thread(target=self._work, name=f"job-worker-{len(self.threads)}", daemon=True)
+                thread.start()
+                self.threads.append(thread)
+
+    @staticmethod
+    def make_key(kind, payload, data=None):
+        digest = hashlib.sha256(kind.encode("utf-8"))
+        digest.update(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+        if data is not None:
+            digest.update(hashlib.sha256(data).digest())
+        return digest.hexdigest()
+
+    def submit(self, kind, payload, data=None, priority=0):
+        """Queue a job, or join the identical queued/running one. Returns (job_id, deduplicated)."""
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        self.ensure_workers()
+        self._evict_finished()
+        key = self.make_key(kind, payload, data)
+        with self.lock:
+            now = time.time()
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute(
+                    "SELECT job_id FROM jobs WHERE dedup_key = ? AND status IN ('queued', 'running') LIMIT 1", (key,)
+                ).fetchone()
+                if row is not None:
+                    # A more urgent duplicate raises the priority of the pending job.
+                    self.conn.execute("UPDATE jobs SET priority = MAX(priority, ?) WHERE job_id = ?", (priority, row[0]))
+                    job_id, deduplicated = row[0], True
+                else:
+                    job_id, deduplicated = uuid.uuid4().hex, False
+                    self.conn.execute(
+                        "INSERT INTO jobs (job_id, kind, dedup_key, priority, status, payload, data, created_at) "
+                        "VALUES (?, ?, ?, ?, 'queued', ?, ?, ?)",
+                        (job_id, kind, key, priority, json.dumps(payload, ensure_ascii=False), data, now),
+                    )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.counters["deduplicated" if deduplicated else "submitted"] += 1
+        with self.condition:
+            self.condition.notify()
+        return job_id, deduplicated
+
+    def get(self, job_id):
+        """Status, timing and (once finished) the result of a job, or None."""
+        self.ensure_workers()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT job_id, kind, priority, status, result, error, error_code, attempts, "
+                "created_at, started_at, finished_at FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        (job_id, kind, priority, status, result, error, error_code, attempts,
+         created_at, started_at, finished_at) = row
+        job = {
+            'job_id': job_id,
+            'kind': kind,
+            'priority': priority,
+            'status': status,
+            'attempts': attempts,
+            'timing': {
+                'queued_seconds': round((started_at or time.time()) - created_at, 3),
+                'run_seconds': round((finished_at or time.time()) - started_at, 3) if started_at else None,
+                'total_seconds': round((finished_at or time.time()) - created_at, 3),
+            },
+        }
+        if status == 'done':
+            job['result'] = json.loads(result)
+        elif status == 'error':
+            job['error'] = error
+            job['error_code'] = error_code
+        return job
+
+    def wait(self, job_id, timeout):
+        """Like get(), but waits up to `timeout` seconds for the job to finish."""
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job['status'] in ('done', 'error') or remaining <= 0:
+                return job
+            # Jobs run by other processes are only seen by polling.
+            with self.condition:
+                self.condition.wait(min(self.poll_interval, remaining))
+
+    def stats(self):
+        self.ensure_workers()
+        with self.lock:
+            by_status = dict(self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            timings = {
+                kind: {'jobs': count, 'avg_queued_seconds': round(queued, 3), 'avg_run_seconds': round(run, 3)}
+                for kind, count, queued, run in self.conn.execute(
+                    "SELECT kind, COUNT(*), AVG(started_at - created_at), AVG(finished_at - started_at) "
+                    "FROM jobs WHERE status IN ('done', 'error') GROUP BY kind"
+                )
+            }
+            counters = dict(self.counters)
+        requested = counters["submitted"] + counters["deduplicated"]
+        return {
+            **counters,
+            "dedup_ratio": round(counters["deduplicated"] / requested, 4) if requested else 0.0,
+            "workers": self.worker_count,
+            "jobs": by_status,
+            "timings": timings,
+        }
+
+    # ---- batch progress ----
+
+    def create_batch(self, total):
+        """Record a new batch of `total` items and return its ID."""
+        self._check_fork()
+        self._evict_finished()
+        batch_id = uuid.uuid4().hex
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO batches (batch_id, total, created_at) VALUES (?, ?, ?)", (batch_id, total, time.time())
+            )
+        return batch_id
+
+    def add_batch_result(self, batch_id, result):
+        """Append the result of one item; `result['status'] == 'error'` counts as an error."""
+        self._check_fork()
+        with self.lock:
+            now = time.time()
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute(
+                    "INSERT INTO batch_results (batch_id, seq, result) "
+                    "SELECT ?, completed, ? FROM batches WHERE batch_id = ?",
+                    (batch_id, json.dumps(result, ensure_ascii=False), batch_id),
+                )
+                self.conn.execute(
+                    "UPDATE batches SET completed = completed + 1, errors = errors + ?, "
+                    "finished_at = CASE WHEN completed + 1 >= total THEN ? ELSE finished_at END WHERE batch_id = ?",
+                    (1 if result.get('status') == 'error' else 0, now, batch_id),
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        with self.condition:
+            self.condition.notify_all()
+
+    def get_batch(self, batch_id, start=0):
+        """Progress of a batch with its results from index `start` on (none for None), or None."""
+        self._check_fork()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT total, completed, errors, created_at, finished_at FROM batches WHERE batch_id = ?", (batch_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            results = [] if start is None else [json.loads(result) for (result,) in self.conn.execute(
+                "SELECT result FROM batch_results WHERE batch_id = ? AND seq >= ? ORDER BY seq", (batch_id, start)
+            )]
+        total, completed, errors, created_at, finished_at = row
+        return {
+            'job_id': batch_id,
+            'total': total,
+            'completed': completed,
+            'errors': errors,
+            'done': completed >= total,
+            'elapsed': round((finished_at or time.time()) - created_at, 3),
+            'results': results,
+        }
+
+    def wait_batch(self, batch_id, start, timeout):
+        """Like get_batch(), but waits up to `timeout` seconds for a result past `start` or the end."""
+        deadline = time.monotonic() + timeout
+        while True:
+            batch = self.get_batch(batch_id, start)
+            remaining = deadline - time.monotonic()
+            if batch is None or batch['results'] or batch['done'] or remaining <= 0:
+                return batch
+            with self.condition:
+                self.condition.wait(min(self.poll_interval, remaining))
+
+    def _claim(self):
+        kinds = list(self.handlers)
+        marks = ",".join("?" for _ in kinds)
+        with self.lock:
+            now = time.time()
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute(
+                    f"SELECT job_id, kind, payload, data FROM jobs "
+                    f"WHERE (status = 'queued' OR (status = 'running' AND lease_expires_at < ?)) AND kind IN ({marks}) "
+                    f"ORDER BY priority DESC, created_at LIMIT 1",
+                    [now] + kinds,
+                ).fetchone()
+                if row is not None:
+                    self.conn.execute(
+                        "UPDATE jobs SET status = 'running', started_at = ?, lease_expires_at = ?, "
+                        "attempts = attempts + 1 WHERE job_id = ?",
+                        (now, now + self.lease, row[0]),
+                    )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return row
+
+    def _finish(self, job_id, result=None, error=None, error_code=None):
+        status = 'error' if error is not None else 'done'
+        with self.lock:
+            # The payload blob is no longer needed once the job has run.
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, error_code = ?, finished_at = ?, data = NULL "
+                "WHERE job_id = ?",
+                (status, None if result is None else json.dumps(result, ensure_ascii=False), error, error_code,
+                 time.time(), job_id),
+            )
+            self.counters["failed" if error is not None else "completed"] += 1
+        with self.condition:
+            self.condition.notify_all()
+
+    def _work(self):
+        while True:
+            try:
+                row = self._claim()
+            except sqlite3.Error as e:
+                logger.exception("Job queue unavailable: %s", e)
+                row = None
+            if row is None:
+                with self.condition:
+                    self.condition.wait(self.poll_interval)
+                continue
+            job_id, kind, payload, data = row
+            try:
+                result = self.handlers[kind](json.loads(payload), data)
+            except JobFailed as e:
+                self._finish(job_id, error=str(e), error_code=e.code)
+            except Exception as e:
+                self._finish(job_id, error=str(e), error_code=500)
+            else:
+                self._finish(job_id, result=result)
+
+    def _evict_finished(self):
+        cutoff = time.time() - self.result_ttl
+        with self.lock:
+            self.conn.execute("DELETE FROM jobs WHERE status IN ('done', 'error') AND finished_at < ?", (cutoff,))
+            self.conn.execute(
+                "DELETE FROM batch_results WHERE batch_id IN (SELECT batch_id FROM batches WHERE finished_at < ?)",
+                (cutoff,),
+            )
+            self.conn.execute("DELETE FROM batches WHERE finished_at < ?", (cutoff,))
@@ -0,0 +1,58 @@
+import json
+
+class JSONFieldStream:
+    """Incrementally pull top-level fields out of a JSON object being streamed.
+
+    Text before the first '{' (e.g. a ```json fence) is skipped. A field is
+    emitted only once the separator after its value (',' or '}') has arrived,
+    so partially received numbers or strings are never reported.
+    """
+
+    def __init__(self):
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = None
+        self.finished = False
+        self.fields = {}
+
+    def feed(self, text):
+        """Add streamed text and return the list of newly completed (key, value) pairs."""
+        self.buffer += text
+        completed = []
+        if self.finished:
+            return completed
+        if self.pos is None:
+            start = self.buffer.find("{")
+            if start == -1:
+                return completed
+            self.pos = start + 1
+
+        while True:
+            pos = self._skip_whitespace(self.pos)
+            if pos >= len(self.buffer):
+                break
+            if self.buffer[pos] == "}":
+                self.finished = True
+                break
+            if self.buffer[pos] == ",":
+                pos = self._skip_whitespace(pos + 1)
+            try:
+                key, pos = self.decoder.raw_decode(self.buffer, pos)
+                pos = self._skip_whitespace(pos)
+                if pos >= len(self.buffer) or self.buffer[pos] != ":":
+                    break
+                value, pos = self.decoder.raw_decode(self.buffer, self._skip_whitespace(pos + 1))
+            except json.JSONDecodeError:
+                break
+            end = self._skip_whitespace(pos)
+            if end >= len(self.buffer) or self.buffer[end] not in ",}":
+                break
+            self.fields[key] = value
+            completed.append((key, value))
+            self.pos = end
+        return completed
+
+    def _skip_whitespace(self, pos):
+        while pos < len(self.buffer) and self.buffer[pos].isspace():
+            pos += 1
+        return pos
@@ -0,0 +1,205 @@
+import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+from dotenv import load_dotenv
+import asyncio
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from metrics import LLM_CALLS, LLM_RETRIES, LLM_TOKENS, STAGE_DURATION
+load_dotenv()
+
+RETRYABLE_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.TooManyRequests,
+    google_exceptions.ServiceUnavailable,
+)
+
+_STREAM_END = object()
+
+logger = logging.getLogger(__name__)
+
+class LLMClient:
+    """One configured Gemini model shared by every agent.
+
+    All calls run on a single background event loop through the SDK's async
+    API, so the async gRPC channel is created once and reused. The loop
+    enforces a concurrency limit (LLM_MAX_CONCURRENCY), a per-call timeout
+    (LLM_TIMEOUT) and retries rate-limit/unavailable errors with exponential
+    backoff (LLM_MAX_RETRIES, LLM_BACKOFF). Hitting the timeout, or closing
+    a stream, cancels the in-flight request.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        with cls._lock:
+            if cls._instance is None:
+                genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+                instance = super(LLMClient, cls).__new__(cls)
+                instance.model = genai.GenerativeModel(model_name=os.getenv("MODEL_NAME"))
+                instance.max_concurrency = int(os.getenv("LLM_MAX_CONCURRENCY", 8))
+                instance.timeout = float(os.getenv("LLM_TIMEOUT", 60))
+                instance.max_retries = int(os.getenv("LLM_MAX_RETRIES", 3))
+                instance.backoff = float(os.getenv("LLM_BACKOFF", 1.0))
+                instance.pid = os.getpid()
+                instance.usage_lock = threading.Lock()
+                instance.usage = {"calls": 0, "prompt_tokens": 0, "output_tokens": 0}
+                instance._start_loop()
+                cls._instance = instance
+        return cls._instance
+
+    def _start_loop(self):
+        self.loop = asyncio.new_event_loop()
+        self.semaphore = None
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            self.semaphore = asyncio.Semaphore(self.max_concurrency)
+            ready.set()
+            self.loop.run_forever()
+
+        threading.Thread(target=run, name="llm-client-loop", daemon=True).start()
+        ready.wait()
+
+    def _check_fork(self):
+        # The loop thread and gRPC channel do not survive fork(); a worker
+        # forked from a parent that already used the client starts its own.
+        if self.pid != os.getpid():
+            with self._lock:
+                if self.pid != os.getpid():
+                    self.model = genai.GenerativeModel(model_name=os.getenv("MODEL_NAME"))
+                    self._start_loop()
+                    self.pid = os.getpid()
+
+    async def _call(self, prompt, timeout, **kwargs):
+        attempt = 0
+        while True:
+            try:
+                async with self.semaphore:
+                    start = time.perf_counter()
+                    response = await asyncio.wait_for(self.model.generate_content_async(prompt, **kwargs), timeout)
+                    STAGE_DURATION.observe(time.perf_counter() - start, "llm.generate_content")
+                LLM_CALLS.inc("generate", "ok")
+                self._record_usage(response)
+                return response
+            except RETRYABLE_ERRORS:
+                if attempt >= self.max_retries:
+                    LLM_CALLS.inc("generate", "error")
+                    raise
+                LLM_RETRIES.inc()
+                await self._backoff(attempt)
+                attempt += 1
+            except asyncio.CancelledError:
+                LLM_CALLS.inc("generate", "cancelled")
+                raise
+            except Exception:
+                LLM_CALLS.inc("generate", "error")
+                raise
+
+    async def _stream(self, prompt, timeout, chunks, **kwargs):
+        # Only opening the stream is retried; once text has been handed out
+        # a failure is reported to the reader instead.
+        attempt = 0
+        emitted = False
+        while True:
+            try:
+                async with self.semaphore:
+                    response = await asyncio.wait_for(
+                        self.model.generate_content_async(prompt, stream=True, **kwargs), timeout
+                    )
+                    iterator = response.__aiter__()
+                    chunk = None
+                    while True:
+                        try:
+                            chunk = await asyncio.wait_for(iterator.__anext__(), timeout)
+                        except StopAsyncIteration:
+                            LLM_CALLS.inc("stream", "ok")
+                            # The last chunk carries the usage of the whole response.
+                            self._record_usage(chunk)
+                            return
+                        chunks.put(chunk.text)
+                        emitted = True
+            except RETRYABLE_ERRORS:
+                if emitted or attempt >= self.max_retries:
+                    LLM_CALLS.inc("stream", "error")
+                    raise
+                LLM_RETRIES.inc()
+                await self._backoff(attempt)
+                attempt += 1
+            except asyncio.CancelledError:
+                LLM_CALLS.inc("stream", "cancelled")
+                raise
+            except Exception:
+                LLM_CALLS.inc("stream", "error")
+                raise
+
+    def _record_usage(self, response):
+        usage = getattr(response, 'usage_metadata', None)
+        if usage is None:
+            return
+        prompt_tokens = getattr(usage, 'prompt_token_count', 0) or 0
+        output_tokens = getattr(usage, 'candidates_token_count', 0) or 0
+        with self.usage_lock:
+            self.usage["calls"] += 1
+            self.usage["prompt_tokens"] += prompt_tokens
+            self.usage["output_tokens"] += output_tokens
+        LLM_TOKENS.inc("input", amount=prompt_tokens)
+        LLM_TOKENS.inc("output", amount=output_tokens)
+        logger.info("LLM call: %d input tokens, %d output tokens", prompt_tokens, output_tokens)
+
+    def stats(self):
+        """Token usage reported by the API since the process started."""
+        with self.usage_lock:
+            usage = dict(self.usage)
+        calls = usage["calls"]
+        usage["avg_prompt_tokens"] = round(usage["prompt_tokens"] / calls, 1) if calls else 0.0
+        usage["avg_output_tokens"] = round(usage["output_tokens"] / calls, 1) if calls else 0.0
+        return usage
+
+    async def _backoff(self, attempt):
+        delay = self.backoff * (2 ** attempt)
+        await asyncio.sleep(delay + random.uniform(0, delay / 2))
+
+    def submit(self, prompt, timeout=None, **kwargs):
+        """Schedule a call on the client loop and return its concurrent future."""
+        self._check_fork()
+        return asyncio.run_coroutine_threadsafe(self._call(prompt, timeout or self.timeout, **kwargs), self.loop)
+
+    def generate_content(self, prompt, timeout=None, **kwargs):
+        """Blocking call for synchronous callers."""
+        future = self.submit(prompt, timeout=timeout, **kwargs)
+        try:
+            return future.result()
+        except BaseException:
+            future.cancel()
+            raise
+
+    def stream_content(self, prompt, timeout=None, **kwargs):
+        """Yield response text chunks as they arrive (`stream=True`).
+
+        `timeout` applies to each chunk. Closing the generator early, e.g.
+        when the HTTP client disconnects, cancels the request.
+        """
+        self._check_fork()
+        chunks = queue.Queue()
+
+        async def run():
+            try:
+                await self._stream(prompt, timeout or self.timeout, chunks, **kwargs)
+            finally:
+                chunks.put(_STREAM_END)
+
+        future = asyncio.run_coroutine_threadsafe(run(), self.loop)
+        try:
+            while True:
+                chunk = chunks.get()
+                if chunk is _STREAM_END:
+                    break
+                yield chunk
+            future.result()
+        finally:
+            future.cancel()
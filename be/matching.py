@@ -1,99 +1,117 @@
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import spacy
+import heapq
 import json
+import logging
+import os
 from gen import GenAgent
-nlp = spacy.load("en_core_web_lg")
+from jd_cache import JDCache
+from embeddings import EmbeddingStore
+from tfidf_scorer import TfidfScorer
+from scoring_profiles import ScoringProfiles, rank_profiles
+from metrics import span
 
-def enhanced_ranking(extracted_jd, resumes_data):
-    """Nâng cấp hệ thống ranking với xử lý structured data và trả về chi tiết điểm số"""
+logger = logging.getLogger(__name__)
+
+# With top-k retrieval, only k * factor candidates (by skill overlap) reach the
+# TF-IDF and semantic stages.
+TOPK_PREFILTER_FACTOR = int(os.getenv("TOPK_PREFILTER_FACTOR", 5))
+
+def build_resume_text(resume):
+    return f"""
+        {resume['applicant_name']}
+        Education: {resume['highest_level_of_education']} in {resume['area_of_study']} at {resume['institution']}
+        Skills: {', '.join(resume['skills'])}
+        Experience: {len(resume['experiences'])} positions
+        """
+
+def build_job_text(job_description):
+    return f"{job_description['job_title']} {' '.join(job_description['requirements'])}"
+
+def normalize_skill(skill):
+    return skill.lower()
+
+def prune_by_skills(job_skills, resume_skill_sets, k=None, min_skill_match=0.0):
+    """Chỉ số các CV đạt ngưỡng kỹ năng, giữ tối đa k * TOPK_PREFILTER_FACTOR CV khi có k."""
+    hits = []
+    for i, resume_skills in enumerate(resume_skill_sets):
+        overlap = len(job_skills & resume_skills)
+        skill_match = overlap / len(job_skills) if job_skills else 0
+        if skill_match >= min_skill_match:
+            hits.append((i, overlap))
+    if k is not None and TOPK_PREFILTER_FACTOR > 0 and len(hits) > k * TOPK_PREFILTER_FACTOR:
+        hits = heapq.nlargest(k * TOPK_PREFILTER_FACTOR, hits, key=lambda hit: hit[1])
+        hits.sort()
+    return [i for i, _ in hits]
+
+def enhanced_ranking(extracted_jd, resumes_data, k=None, min_skill_match=0.0, profile=None, profiles=None):
+    """Nâng cấp hệ thống ranking với xử lý structured data và trả về chi tiết điểm số
+
+    Khi có `k` hoặc `min_skill_match`, CV được lọc theo số kỹ năng trùng khớp
+    trước các bước TF-IDF và semantic, và chỉ trả về k kết quả tốt nhất.
+    `profile` chọn bộ trọng số (ScoringProfile); với `profiles`, kết quả là
+    dict theo tên profile.
+    """
     
     # Chuẩn bị dữ liệu
     try:
-        job_description = GenAgent().generate_content2(extracted_jd)
-        job_text = f"{job_description['job_title']} {' '.join(job_description['requirements'])}"
+        with span("enhanced_ranking.jd_parse"):
+            job_description = JDCache().get_or_parse(extracted_jd, GenAgent().generate_content2)
+        job_text = build_job_text(job_description)
         resumes_texts = []
     except Exception as e:
-        print(f"An error occurred while processing job description: {e}")
-        return []
+        logger.exception("An error occurred while processing job description: %s", e)
+        return {p.name: [] for p in profiles} if profiles else []
     
-    resumes_data = json.loads(resumes_data)
+    with span("enhanced_ranking.load_resumes"):
+        resumes_data = json.loads(resumes_data)
+
+    resume_skill_sets = None
+    if k is not None or min_skill_match > 0:
+        with span("enhanced_ranking.skill_prefilter"):
+            job_skills = set(normalize_skill(s) for s in job_description['required_skills'])
+            resume_skill_sets = [set(normalize_skill(s) for s in resume['skills']) for resume in resumes_data]
+            kept = prune_by_skills(job_skills, resume_skill_sets, k=k, min_skill_match=min_skill_match)
+            # Giữ id theo vị trí ban đầu vì danh sách bị rút gọn
+            resumes_data = [resumes_data[i] if 'id' in resumes_data[i] else {**resumes_data[i], 'id': i} for i in kept]
+            resume_skill_sets = [resume_skill_sets[i] for i in kept]
+        if not resumes_data:
+            return {p.name: [] for p in profiles} if profiles else []
 
     resumes_texts = []
 
     for resume in resumes_data:
-        resume_text = f"""
-        {resume['applicant_name']}
-        Education: {resume['highest_level_of_education']} in {resume['area_of_study']} at {resume['institution']}
-        Skills: {', '.join(resume['skills'])}
-        Experience: {len(resume['experiences'])} positions
-        """
-        resumes_texts.append(resume_text)
+        resumes_texts.append(build_resume_text(resume))
 
     # TF-IDF Vectorization
-    vectorizer = TfidfVectorizer(stop_words="english", ngram_range=(1,2)).fit_transform([job_text] + resumes_texts)
-    vectors = vectorizer.toarray()
-    job_vector = vectors[0]
-    resume_vectors = vectors[1:]
-    tfidf_scores = cosine_similarity([job_vector], resume_vectors)[0]
+    with span("enhanced_ranking.tfidf"):
+        tfidf_scores = TfidfScorer().score(job_text, resumes_texts)
     4
-    # Semantic similarity
-    job_doc = nlp(job_text)
-    semantic_scores = []
-    for text in resumes_texts:
-        resume_doc = nlp(text)
-        semantic_scores.append(job_doc.similarity(resume_doc))
+    # Semantic similarity (embedding chỉ được cache trong bộ nhớ, không lưu xuống đĩa)
+    with span("enhanced_ranking.semantic"):
+        semantic_scores = EmbeddingStore().similarity(job_text, resumes_texts)
     5
-    # Tính toán matching score chi tiết
-    results = []
-    for i, resume in enumerate(resumes_data):
-        # Skill matching (Jaccard similarity)
-        job_skills = set(s.lower() for s in job_description['required_skills'])
-        resume_skills = set(s.lower() for s in resume['skills'])
-        common_skills = job_skills & resume_skills
-        missing_skills = job_skills - resume_skills
-        
-        skill_match = len(common_skills) / len(job_skills) if job_skills else 0
-        
-        # Experience matching
-        required_exp = job_description.get('min_experience', 0)
-        actual_exp = len(resume['experiences'])
-        exp_match = min(actual_exp / max(required_exp, 1), 1.0)
-        
-        # Education matching
-        edu_fields = [f.lower() for f in job_description.get('education_fields', [])]
-        edu_match = 1 if resume['area_of_study'].lower() in edu_fields else 0.5
-        
-        # Combined score
-        combined_score = (
-            0.1 * tfidf_scores[i] + 
-            0.2 * semantic_scores[i] + 
-            0.45 * skill_match + 
-            0.15 * exp_match + 
-            0.1 * edu_match
-        )
-        
-        # Lưu kết quả chi tiết
-        result = {
-            'id': resume['id'] if 'id' in resume else i,
-            'applicant_name': resume['applicant_name'],
-            'total_score': round(combined_score * 100, 2),
-            'score_breakdown': {
-                'tfidf_score': round(tfidf_scores[i] * 100, 2),
-                'semantic_score': round(semantic_scores[i] * 100, 2),
-                'skill_match': round(skill_match * 100, 2),
-                'experience_match': round(exp_match * 100, 2),
-                'education_match': round(edu_match * 100, 2)
-            },
-            'matched_skills': list(common_skills),
-            'missing_skills': list(missing_skills)
-        }
-        results.append(result)
-    6
-    # Sắp xếp kết quả theo điểm số giảm dần
-    results.sort(key=lambda x: x['total_score'], reverse=True)
-    
-    return results
+    with span("enhanced_ranking.combine_scores"):
+        return combine_scores(job_description, resumes_data, tfidf_scores, semantic_scores,
+                              resume_skill_sets=resume_skill_sets, k=k, profile=profile, profiles=profiles)
+
+def combine_scores(job_description, resumes_data, tfidf_scores, semantic_scores, resume_skill_sets=None, k=None,
+                   profile=None, profiles=None):
+    """Tính điểm tổng hợp và sắp xếp kết quả bằng các phép toán vector (scoring.py).
+
+    `resume_skill_sets` cho phép truyền sẵn tập kỹ năng đã chuẩn hoá của từng CV.
+    Khi có `k`, chỉ k kết quả tốt nhất được chọn và dựng kết quả.
+    `profile` là ScoringProfile dùng để tính điểm (mặc định: profile "default").
+    Với danh sách `profiles`, các cột điểm chỉ được tính một lần và kết quả là
+    dict {tên profile: danh sách kết quả}.
+    """
+    job_skills = set(normalize_skill(s) for s in job_description['required_skills'])
+    if resume_skill_sets is None:
+        resume_skill_sets = [set(normalize_skill(s) for s in resume['skills']) for resume in resumes_data]
+    if profiles:
+        return rank_profiles(profiles, job_description, job_skills, resumes_data, resume_skill_sets,
+                             tfidf_scores, semantic_scores, k=k)
+    profile = ScoringProfiles().resolve(profile)
+    return profile.rank(job_description, job_skills, resumes_data, resume_skill_sets,
+                        tfidf_scores, semantic_scores, k=k)
 
 # # Job description mẫu
 # job_desc = {
@@ -0,0 +1,140 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+import bisect
+import functools
+import inspect
+import threading
+import time
+
+# Seconds; covers fast scoring stages up to slow LLM calls.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_metrics = []
+_metrics_lock = threading.Lock()
+
+def _label_text(labelnames, values):
+    if not labelnames:
+        return ''
+    pairs = []
+    for name, value in zip(labelnames, values):
+        value = str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.values = {}
+        with _metrics_lock:
+            _metrics.append(self)
+
+    def inc(self, *labels, amount=1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for labels, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_label_text(self.labelnames, labels)} {value}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.lock = threading.Lock()
+        # labels -> [per-bucket counts (last one is +Inf), sum]
+        self.values = {}
+        with _metrics_lock:
+            _metrics.append(self)
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            state = self.values.get(labels)
+            if state is None:
+                state = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ('le',)
+        with self.lock:
+            for labels, (counts, total) in sorted(self.values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f"{self.name}_bucket{_label_text(names, labels + (le,))} {cumulative}")
+                lines.append(f"{self.name}_sum{_label_text(self.labelnames, labels)} {total}")
+                lines.append(f"{self.name}_count{_label_text(self.labelnames, labels)} {cumulative}")
+        return lines
+
+def render_metrics():
+    """All metrics of this process in the Prometheus text exposition format."""
+    with _metrics_lock:
+        metrics = list(_metrics)
+    lines = []
+    for metric in metrics:
+        lines += metric.render()
+    return '\n'.join(lines) + '\n'
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency until the response is returned.",
+    ("method", "endpoint", "status"),
+)
+STAGE_DURATION = Histogram(
+    "stage_duration_seconds", "Duration of instrumented processing stages.", ("stage",),
+)
+PDF_PAGE_DURATION = Histogram(
+    "pdf_page_extraction_seconds", "Time to extract the text of one PDF page.",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+LLM_CALLS = Counter("llm_calls_total", "Gemini calls by outcome.", ("kind", "outcome"))
+LLM_RETRIES = Counter("llm_retries_total", "Gemini calls retried after a rate-limit or unavailable error.")
+LLM_TOKENS = Counter("llm_tokens_total", "Tokens reported by the Gemini API.", ("direction",))
+LLM_COALESCED = Counter("llm_coalesced_calls_total", "Agent calls served by an identical in-flight call.", ("agent",))
+
+# Stages of the current request, for the Server-Timing header.
+_request_spans = ContextVar("request_spans", default=None)
+
+def start_request_spans():
+    spans = []
+    _request_spans.set(spans)
+    return spans
+
+@contextmanager
+def span(stage):
+    """Time a block as `stage` in stage_duration_seconds and in the request's spans."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_DURATION.observe(elapsed, stage)
+        spans = _request_spans.get()
+        if spans is not None:
+            spans.append((stage, elapsed))
+
+def timed(stage):
+    """Decorator form of span() for plain and async functions."""
+    def decorate(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                with span(stage):
+                    return await fn(*args, **kwargs)
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with span(stage):
+                    return fn(*args, **kwargs)
+        return wrapper
+    return decorate
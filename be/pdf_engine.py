@@ -0,0 +1,153 @@
+from concurrent.futures import ProcessPoolExecutor
+from dotenv import load_dotenv
+import fitz
+import multiprocessing
+import os
+import threading
+import time
+load_dotenv()
+
+class PdfExtraction:
+    def __init__(self, pages, page_count, page_timings, truncated):
+        self.pages = pages
+        self.page_count = page_count
+        self.page_timings = page_timings
+        self.truncated = truncated
+
+    @property
+    def text(self):
+        return "\n".join(self.pages).strip()
+
+    def summary(self):
+        seconds = [t['seconds'] for t in self.page_timings]
+        return {
+            'page_count': self.page_count,
+            'pages_extracted': len(self.pages),
+            'chars': sum(t['chars'] for t in self.page_timings),
+            'truncated': self.truncated,
+            'total_seconds': round(sum(seconds), 6),
+            'slowest_page': max(self.page_timings, key=lambda t: t['seconds']) if self.page_timings else None,
+        }
+
+def _open(source):
+    if isinstance(source, (bytes, bytearray)):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+def _extract_pages(doc, start, stop, max_chars=None):
+    """Extract pages [start, stop) of an open document, stopping once `max_chars` is reached."""
+    pages, timings = [], []
+    chars = 0
+    for page_number in range(start, min(stop, doc.page_count)):
+        began = time.perf_counter()
+        page_text = doc.load_page(page_number).get_text("text")
+        timings.append({
+            'page': page_number,
+            'seconds': round(time.perf_counter() - began, 6),
+            'chars': len(page_text),
+        })
+        pages.append(page_text)
+        chars += len(page_text)
+        if max_chars and chars >= max_chars:
+            break
+    return pages, timings
+
+def extract_page_range(source, start, stop, max_chars=None):
+    """Extract pages [start, stop) of `source`, stopping once `max_chars` is reached.
+
+    Module-level so it can run in a worker process.
+    """
+    doc = _open(source)
+    try:
+        return _extract_pages(doc, start, stop, max_chars)
+    finally:
+        doc.close()
+
+class PdfTextEngine:
+    """Budgeted, optionally page-parallel PDF text extraction.
+
+    Extraction stops after PDF_MAX_PAGES pages or PDF_MAX_CHARS characters.
+    Documents with at least PDF_PARALLEL_MIN_PAGES pages are split into page
+    ranges across PDF_WORKERS processes; with PDF_WORKERS=1 everything runs
+    in the calling process.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        with cls._lock:
+            if cls._instance is None:
+                instance = super(PdfTextEngine, cls).__new__(cls)
+                instance.max_pages = int(os.getenv("PDF_MAX_PAGES", 50))
+                instance.max_chars = int(os.getenv("PDF_MAX_CHARS", 200000))
+                instance.workers = int(os.getenv("PDF_WORKERS", 1))
+                instance.parallel_min_pages = int(os.getenv("PDF_PARALLEL_MIN_PAGES", 16))
+                instance.pool = None
+                cls._instance = instance
+        return cls._instance
+
+    def _get_pool(self, workers):
+        with self._lock:
+            if self.pool is None or self.pool._max_workers < workers:
+                if self.pool is not None:
+                    self.pool.shutdown(wait=False)
+                self.pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            return self.pool
+
+    def extract(self, source, max_pages=None, max_chars=None, workers=None):
+        """Extract text from a PDF path or bytes within the page/character budget."""
+        max_pages = self.max_pages if max_pages is None else max_pages
+        max_chars = self.max_chars if max_chars is None else max_chars
+        workers = self.workers if workers is None else workers
+
+        # Opened once: the page count and a sequential extraction share the handle.
+        doc = _open(source)
+        try:
+            page_count = doc.page_count
+            stop = min(page_count, max_pages) if max_pages else page_count
+            if workers > 1 and stop >= self.parallel_min_pages:
+                pages, timings = self._extract_parallel(source, stop, max_chars, workers)
+            else:
+                pages, timings = _extract_pages(doc, 0, stop, max_chars)
+        finally:
+            doc.close()
+
+        truncated = len(pages) < page_count
+        if max_chars:
+            pages, cut = self._apply_char_budget(pages, max_chars)
+            truncated = truncated or cut
+        return PdfExtraction(pages, page_count, timings[:len(pages)], truncated)
+
+    def _extract_parallel(self, source, stop, max_chars, workers):
+        chunk = -(-stop // workers)
+        ranges = [(start, min(start + chunk, stop)) for start in range(0, stop, chunk)]
+        pool = self._get_pool(workers)
+        futures = [pool.submit(extract_page_range, source, start, end, max_chars) for start, end in ranges]
+        pages, timings = [], []
+        chars = 0
+        for future in futures:
+            range_pages, range_timings = future.result()
+            pages += range_pages
+            timings += range_timings
+            chars += sum(len(p) for p in range_pages)
+            # Later ranges are only needed while the budget is not spent.
+            if max_chars and chars >= max_chars:
+                for rest in futures:
+                    rest.cancel()
+                break
+        return pages, timings
+
+    @staticmethod
+    def _apply_char_budget(pages, max_chars):
+        # Counts the newline that joins pages, so the final text fits the budget.
+        kept = []
+        chars = 0
+        for page_text in pages:
+            room = max_chars - chars - (1 if kept else 0)
+            if len(page_text) > room:
+                if room > 0:
+                    kept.append(page_text[:room])
+                return kept, True
+            chars += len(page_text) + (1 if kept else 0)
+            kept.append(page_text)
+        return kept, False
@@ -0,0 +1,91 @@
+from collections import Counter
+from dotenv import load_dotenv
+import logging
+import os
+import sys
+import threading
+import time
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+class SamplingProfiler:
+    """Samples the stack of one thread every `interval` seconds.
+
+    Stacks are aggregated in the folded format ("outer;inner;leaf count")
+    that flamegraph.pl, inferno and speedscope turn into a flamegraph.
+    """
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+        return self
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+
+    def folded(self):
+        return '\n'.join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + '\n'
+
+class SlowRequestProfiler:
+    """Opt-in (PROFILE_SLOW_REQUESTS=1) profiling of requests.
+
+    Every request is sampled every PROFILE_INTERVAL seconds; requests slower
+    than PROFILE_THRESHOLD seconds have their folded stacks written to
+    PROFILE_DIR as <timestamp>-<endpoint>.folded. Only the thread serving the
+    request is sampled, so work handed to the LLM client loop or process
+    pools shows up as waiting.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        with cls._lock:
+            if cls._instance is None:
+                instance = super(SlowRequestProfiler, cls).__new__(cls)
+                instance.enabled = os.getenv("PROFILE_SLOW_REQUESTS") == "1"
+                instance.threshold = float(os.getenv("PROFILE_THRESHOLD", 2.0))
+                instance.interval = float(os.getenv("PROFILE_INTERVAL", 0.005))
+                instance.directory = os.getenv("PROFILE_DIR", "profiles")
+                cls._instance = instance
+        return cls._instance
+
+    def start(self):
+        if not self.enabled:
+            return None
+        return SamplingProfiler(threading.get_ident(), self.interval).start()
+
+    def finish(self, profiler, name, elapsed):
+        """Stop `profiler` and dump its stacks if the request took longer than the threshold."""
+        if profiler is None:
+            return None
+        profiler.stop()
+        if elapsed < self.threshold or not profiler.stacks:
+            return None
+        os.makedirs(self.directory, exist_ok=True)
+        safe_name = ''.join(c if c.isalnum() else '_' for c in name).strip('_') or 'request'
+        path = os.path.join(self.directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{int(elapsed * 1000)}ms-{safe_name}.folded")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(profiler.folded())
+        logger.warning("Slow request %s took %.2fs, profile written to %s", name, elapsed, path)
+        return path
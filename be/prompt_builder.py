@@ -0,0 +1,203 @@
+from dotenv import load_dotenv
+import json
+import logging
+import math
+import os
+import re
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", 8000))
+PROMPT_CHARS_PER_TOKEN = float(os.getenv("PROMPT_CHARS_PER_TOKEN", 4))
+
+TRUNCATION_MARK = "[...]"
+
+# "Page 2", "Page 2 of 5", "2 of 5", "2/5": explicit page numbers left over from PDF extraction.
+PAGE_NUMBER = re.compile(r'^(page\s*\d+(\s*(/|of)\s*\d+)?|\d+\s*(/|of)\s*\d+)$', re.IGNORECASE)
+# A bare number is only a page number as part of a page count (1, 2, 3...) across the document.
+BARE_NUMBER = re.compile(r'^\d{1,3}$')
+# Repeated lines at least this long are headers/footers, not structure.
+BOILERPLATE_MIN_CHARS = 30
+
+def estimate_tokens(text):
+    return math.ceil(len(text) / PROMPT_CHARS_PER_TOKEN)
+
+def normalize_whitespace(text):
+    """Collapse runs of spaces and blank lines only; every line is kept.
+
+    Used for chat messages, where a line such as "2" is the whole question.
+    """
+    text = re.sub(r'[^\S\n]+', ' ', str(text))
+    text = re.sub(r' ?\n ?', '\n', text)
+    return re.sub(r'\n{3,}', '\n\n', text).strip()
+
+def page_counter_lines(lines):
+    """Indexes of bare-number lines that count pages: runs of consecutive values in document order.
+
+    A lone number (a phone number, a year, an answer) is never one of them.
+    """
+    numbers = [(i, int(line)) for i, line in enumerate(lines) if BARE_NUMBER.match(line)]
+    counters = set()
+    for (i, previous), (j, current) in zip(numbers, numbers[1:]):
+        if current == previous + 1:
+            counters.update((i, j))
+    return counters
+
+def normalize_text(text):
+    """Collapse whitespace and drop page numbers, repeated long lines and extra blank lines.
+
+    Document cleanup for extracted resumes and job descriptions. Short
+    repeated lines (section titles such as "Responsibilities:") are kept
+    unless they repeat back to back.
+    """
+    raw_lines = [re.sub(r'\s+', ' ', line).strip() for line in str(text).splitlines()]
+    page_counters = page_counter_lines(raw_lines)
+    lines = []
+    seen = set()
+    for i, line in enumerate(raw_lines):
+        if not line:
+            if lines and lines[-1]:
+                lines.append('')
+            continue
+        if PAGE_NUMBER.match(line) or i in page_counters:
+            continue
+        key = line.lower()
+        if lines and lines[-1].lower() == key:
+            continue
+        if len(line) >= BOILERPLATE_MIN_CHARS:
+            if key in seen:
+                continue
+            seen.add(key)
+        lines.append(line)
+    return '\n'.join(lines).strip()
+
+def compact(value):
+    """Drop empty fields and repeated list items, and normalize the text inside a JSON-like value."""
+    if isinstance(value, dict):
+        items = ((key, compact(item)) for key, item in value.items())
+        return {key: item for key, item in items if item not in (None, '', [], {})}
+    if isinstance(value, (list, tuple)):
+        items = []
+        seen = set()
+        for item in value:
+            item = compact(item)
+            if item in (None, '', [], {}):
+                continue
+            key = json.dumps(item, sort_keys=True, ensure_ascii=False)
+            if key not in seen:
+                seen.add(key)
+                items.append(item)
+        return items
+    if isinstance(value, str):
+        return re.sub(r'\s+', ' ', value).strip()
+    return value
+
+def compact_json(value):
+    return json.dumps(compact(value), ensure_ascii=False, separators=(',', ':'))
+
+def truncate_text(text, max_chars):
+    """Cut `text` to about `max_chars` on line boundaries, keeping the head and a short tail."""
+    if len(text) <= max_chars:
+        return text
+    room = max(max_chars - len(TRUNCATION_MARK) - 2, 0)
+    head_chars = room * 4 // 5
+    tail_chars = room - head_chars
+    head = text[:head_chars]
+    if '\n' in head:
+        head = head[:head.rindex('\n')]
+    tail = text[len(text) - tail_chars:] if tail_chars else ''
+    if '\n' in tail:
+        tail = tail[tail.index('\n') + 1:]
+    return '\n'.join(part for part in (head, TRUNCATION_MARK, tail) if part)
+
+def shrink_json(value, max_chars):
+    """Serialize `value` in at most about `max_chars`, shortening its longest strings and lists."""
+    text = compact_json(value)
+    limit = max(len(text), 1)
+    while len(text) > max_chars and limit > 16:
+        limit //= 2
+        text = json.dumps(_clip(compact(value), limit), ensure_ascii=False, separators=(',', ':'))
+    return text
+
+def _clip(value, limit):
+    if isinstance(value, dict):
+        return {key: _clip(item, limit) for key, item in value.items()}
+    if isinstance(value, list):
+        items = [_clip(item, limit) for item in value[:max(limit // 16, 1)]]
+        if len(value) > len(items):
+            items.append(TRUNCATION_MARK)
+        return items
+    if isinstance(value, str) and len(value) > limit:
+        return value[:limit] + TRUNCATION_MARK
+    return value
+
+class PromptBuilder:
+    """Builds compact, token-budgeted prompts from fixed instructions and inputs.
+
+    Instructions are normalized once. Text inputs are normalized with
+    `normalize` (normalize_text, or normalize_whitespace for chat messages);
+    dicts and lists are sent as compact JSON. When the prompt
+    would exceed `token_budget` (PROMPT_TOKEN_BUDGET, 0 disables it), the
+    room left after the instructions is shared fairly between the inputs:
+    small inputs are kept whole and the large ones are cut down to the rest.
+    """
+
+    def __init__(self, instructions, header='Input data', token_budget=None, normalize=normalize_text):
+        self.raw_instructions_chars = len(instructions)
+        self.instructions = normalize_text(instructions)
+        self.header = header
+        self.normalize = normalize
+        self.token_budget = PROMPT_TOKEN_BUDGET if token_budget is None else token_budget
+
+    def build(self, sections):
+        """`sections` is a list of (label, value); a None label sends the value on its own."""
+        raw_chars = self.raw_instructions_chars + sum(len(str(value)) for _, value in sections)
+        fixed = f"{self.instructions}\n{self.header}:\n"
+        rendered = [(label, value, self.render(value)) for label, value in sections]
+
+        truncated = False
+        if self.token_budget:
+            room = self.token_budget * PROMPT_CHARS_PER_TOKEN - len(fixed)
+            room -= sum(len(label) + 3 for label, _, _ in rendered if label)
+            limits = self.share(room, [len(text) for _, _, text in rendered])
+            for i, (label, value, text) in enumerate(rendered):
+                if len(text) > limits[i]:
+                    truncated = True
+                    if isinstance(value, (dict, list, tuple)):
+                        text = shrink_json(value, limits[i])
+                    else:
+                        text = truncate_text(text, limits[i])
+                    rendered[i] = (label, value, text)
+
+        body = '\n'.join(f"{label}: {text}" if label else text for label, _, text in rendered)
+        prompt = fixed + body
+        logger.info(
+            "Prompt built: %d chars (~%d tokens) from %d raw chars%s",
+            len(prompt), estimate_tokens(prompt), raw_chars, ", truncated" if truncated else "",
+        )
+        return prompt
+
+    def render(self, value):
+        if isinstance(value, (dict, list, tuple)):
+            return compact_json(value)
+        return self.normalize(value)
+
+    @staticmethod
+    def share(room, sizes):
+        """Max-min fair split of `room` characters between inputs of the given sizes."""
+        limits = [0] * len(sizes)
+        pending = sorted(range(len(sizes)), key=lambda i: sizes[i])
+        room = max(int(room), 0)
+        while pending:
+            fair = room // len(pending)
+            i = pending[0]
+            if sizes[i] <= fair:
+                limits[i] = sizes[i]
+                room -= sizes[i]
+                pending.pop(0)
+            else:
+                for i in pending:
+                    limits[i] = fair
+                break
+        return limits
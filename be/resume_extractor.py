@@ -1,5 +1,19 @@
-import fitz
+from dotenv import load_dotenv
 import docx
+import io
+import logging
+import os
+import zipfile
+from pdf_engine import PdfTextEngine
+from metrics import PDF_PAGE_DURATION, span
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", 10 * 1024 * 1024))
+
+class FileTooLargeError(ValueError):
+    pass
 
 class ResumeExtractor:
     _instance = None
@@ -8,34 +22,73 @@ class ResumeExtractor:
         if cls._instance is None:
             cls._instance = super(ResumeExtractor, cls).__new__(cls)
         return cls._instance
-    
-    def extract_text_from_pdf(self, pdf_path):
+
+    def extract_text_from_pdf(self, pdf_source):
+        """`pdf_source` is a file path or the PDF bytes."""
         text = ""
         try:
-            doc = fitz.open(pdf_path)
-            print(doc)
-            for page in doc:
-                text += page.get_text("text") + "\n"
-            doc.close()
+            extraction = PdfTextEngine().extract(pdf_source)
+            for timing in extraction.page_timings:
+                PDF_PAGE_DURATION.observe(timing['seconds'])
+            if extraction.truncated:
+                logger.warning("PDF text cut to the extraction budget: %s", extraction.summary())
+            text = extraction.text
         except Exception as e:
-            print(f"Error when reading PDF: {e}")
-        return text.strip()
+            logger.exception("Error when reading PDF: %s", e)
+        return text
 
-    def extract_text_from_docx(self, docx_path):
+    def extract_text_from_docx(self, docx_source):
+        """`docx_source` is a file path or the DOCX bytes."""
         text = ""
         try:
-            doc = docx.Document(docx_path)
+            if isinstance(docx_source, (bytes, bytearray)):
+                docx_source = io.BytesIO(docx_source)
+            doc = docx.Document(docx_source)
             text = "\n".join([para.text for para in doc.paragraphs])
         except Exception as e:
-            print(f"Error when reading DOCX: {e}")
+            logger.exception("Error when reading DOCX: %s", e)
         return text.strip()
 
+    @staticmethod
+    def detect_format(data):
+        """Return "pdf" or "docx" from the file's magic bytes, or None."""
+        if data[:4] == b"PK\x03\x04":
+            try:
+                with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                    if "word/document.xml" in archive.namelist():
+                        return "docx"
+            except zipfile.BadZipFile:
+                pass
+            return None
+        # The PDF header may follow a few bytes of junk.
+        if b"%PDF-" in data[:1024]:
+            return "pdf"
+        return None
 
-    def extract_resume_text(self, file_path):
-        if file_path.endswith(".pdf"):
-            return self.extract_text_from_pdf(file_path)
-        elif file_path.endswith(".docx"):
-            return self.extract_text_from_docx(file_path)
+    def extract_resume_bytes(self, data, max_size=MAX_UPLOAD_SIZE):
+        """Extract text from an in-memory PDF or DOCX without touching the disk."""
+        if max_size and len(data) > max_size:
+            raise FileTooLargeError(f"File too large, the limit is {max_size} bytes.")
+        with span("resume_extractor.detect_format"):
+            file_format = self.detect_format(data)
+        if file_format == "pdf":
+            with span("resume_extractor.pdf"):
+                return self.extract_text_from_pdf(data)
+        elif file_format == "docx":
+            with span("resume_extractor.docx"):
+                return self.extract_text_from_docx(data)
         else:
             raise ValueError("PDF or DOCX only.")
-    
+
+    def extract_resume_stream(self, stream, max_size=MAX_UPLOAD_SIZE):
+        """Read at most `max_size` bytes from a file-like object and extract its text."""
+        data = stream.read(max_size + 1) if max_size else stream.read()
+        return self.extract_resume_bytes(data, max_size=max_size)
+
+    def extract_resume_text(self, file_path):
+        with open(file_path, "rb") as f:
+            return self.extract_resume_stream(f)
+
+def extract_resume_data(data):
+    """Process-pool entry point: extract the text of one in-memory PDF/DOCX file."""
+    return ResumeExtractor().extract_resume_bytes(data)
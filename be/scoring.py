@@ -0,0 +1,149 @@
+import numpy as np
+
+WEIGHTS = {
+    'tfidf_score': 0.1,
+    'semantic_score': 0.2,
+    'skill_match': 0.45,
+    'experience_match': 0.15,
+    'education_match': 0.1,
+}
+
+class ScoreColumns:
+    """Component scores of a resume batch, one NumPy array per component.
+
+    Skills become a resumes x job-skills membership bitset, experience a count
+    column and education a boolean column, so every component score and the
+    weighted total are a handful of vector operations.
+    """
+
+    def __init__(self, job_description, job_skills, resumes_data, resume_skill_sets, tfidf_scores, semantic_scores):
+        n = len(resumes_data)
+        self.job_skills = job_skills
+        self.skill_names = sorted(job_skills)
+        skill_columns = {skill: col for col, skill in enumerate(self.skill_names)}
+        self.membership = np.zeros((n, len(skill_columns)), dtype=bool)
+        for row, resume_skills in enumerate(resume_skill_sets):
+            cols = [skill_columns[s] for s in resume_skills if s in skill_columns]
+            self.membership[row, cols] = True
+
+        if job_skills:
+            self.skill_match = self.membership.sum(axis=1) / len(job_skills)
+        else:
+            self.skill_match = np.zeros(n)
+
+        required_exp = job_description.get('min_experience', 0)
+        experience = np.fromiter((len(r['experiences']) for r in resumes_data), dtype=np.float64, count=n)
+        self.experience_match = np.minimum(experience / max(required_exp, 1), 1.0)
+
+        edu_fields = set(f.lower() for f in job_description.get('education_fields', []))
+        self.education_flags = np.fromiter(
+            (r['area_of_study'].lower() in edu_fields for r in resumes_data), dtype=bool, count=n
+        )
+        self.education_match = np.where(self.education_flags, 1.0, 0.5)
+
+        self.tfidf = np.asarray(tfidf_scores, dtype=np.float64)
+        self.semantic = np.asarray(semantic_scores, dtype=np.float64)
+
+    def total(self, weights=WEIGHTS):
+        # Same operand order as the per-resume loop, so the floats are identical.
+        return (
+            weights['tfidf_score'] * self.tfidf +
+            weights['semantic_score'] * self.semantic +
+            weights['skill_match'] * self.skill_match +
+            weights['experience_match'] * self.experience_match +
+            weights['education_match'] * self.education_match
+        )
+
+def top_indices(values, k=None):
+    """Indices of `values` in descending order, ties kept in input order.
+
+    Matches list.sort(reverse=True) and heapq.nlargest; with `k` only the
+    k best are selected and sorted.
+    """
+    if k is None or k >= len(values):
+        return np.argsort(-values, kind='stable')
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    threshold = np.partition(values, len(values) - k)[len(values) - k]
+    above = np.flatnonzero(values > threshold)
+    ties = np.flatnonzero(values == threshold)[:k - len(above)]
+    chosen = np.concatenate([above, ties])
+    return chosen[np.argsort(-values[chosen], kind='stable')]
+
+def score_columnar(job_description, job_skills, resumes_data, resume_skill_sets, tfidf_scores, semantic_scores, k=None, weights=WEIGHTS):
+    """Vectorized equivalent of the reference loop, benchmarks/reference_scoring.py.
+
+    Result dicts are only built for the rows that are returned.
+    """
+    if not resumes_data:
+        return []
+    columns = ScoreColumns(job_description, job_skills, resumes_data, resume_skill_sets, tfidf_scores, semantic_scores)
+    return build_results(columns, resumes_data, resume_skill_sets, weights, k)
+
+def score_weightings(job_description, job_skills, resumes_data, resume_skill_sets, tfidf_scores, semantic_scores, weightings, k=None):
+    """Rank one pool under several weightings ({name: weights}) in a single pass.
+
+    The component columns are built once; each weighting only adds a weighted
+    sum and its own top-k selection.
+    """
+    if not resumes_data:
+        return {name: [] for name in weightings}
+    columns = ScoreColumns(job_description, job_skills, resumes_data, resume_skill_sets, tfidf_scores, semantic_scores)
+    return {
+        name: build_results(columns, resumes_data, resume_skill_sets, weights, k)
+        for name, weights in weightings.items()
+    }
+
+def _percent(values):
+    # np.round of the whole column gives the same floats as round(x * 100, 2) per value.
+    return np.round(values * 100, 2).tolist()
+
+def _skill_lists(names, membership):
+    """Per row, the skill names whose membership bit is set, in column order."""
+    flat = names[np.nonzero(membership)[1]].tolist()
+    lists, start = [], 0
+    for end in np.cumsum(membership.sum(axis=1)).tolist():
+        lists.append(flat[start:end])
+        start = end
+    return lists
+
+def build_results(columns, resumes_data, resume_skill_sets, weights, k=None):
+    """Result dicts of the best `k` rows (all rows without `k`), best first.
+
+    Each component is rounded as one column and the matched/missing skills
+    come from the membership bitset, so only the dicts are built per row.
+    """
+    # numpy rounding, as round() on the np.float64 totals of the loop.
+    totals = np.round(columns.total(weights) * 100, 2)
+    order = top_indices(totals, k)
+
+    rows = order.tolist()
+    total_scores = totals[order].tolist()
+    tfidf = _percent(columns.tfidf[order])
+    semantic = _percent(columns.semantic[order])
+    skill_match = _percent(columns.skill_match[order]) if columns.job_skills else [0] * len(rows)
+    experience_match = _percent(columns.experience_match[order])
+    education_match = [100 if flag else 50.0 for flag in columns.education_flags[order].tolist()]
+    membership = columns.membership[order]
+    names = np.array(columns.skill_names, dtype=object)
+    matched = _skill_lists(names, membership)
+    missing = _skill_lists(names, ~membership)
+
+    results = []
+    for j, i in enumerate(rows):
+        resume = resumes_data[i]
+        results.append({
+            'id': resume['id'] if 'id' in resume else i,
+            'applicant_name': resume['applicant_name'],
+            'total_score': total_scores[j],
+            'score_breakdown': {
+                'tfidf_score': tfidf[j],
+                'semantic_score': semantic[j],
+                'skill_match': skill_match[j],
+                'experience_match': experience_match[j],
+                'education_match': education_match[j],
+            },
+            'matched_skills': matched[j],
+            'missing_skills': missing[j],
+        })
+    return results
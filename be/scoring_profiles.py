@@ -0,0 +1,161 @@
+from dotenv import load_dotenv
+from collections import OrderedDict
+import json
+import math
+import os
+import threading
+from scoring import WEIGHTS, score_columnar, score_weightings
+load_dotenv()
+
+COMPONENTS = tuple(WEIGHTS)
+
+# Older clients send the /enhance_resume style names.
+WEIGHT_ALIASES = {
+    'tfidf': 'tfidf_score',
+    'semantic': 'semantic_score',
+    'skill_matching': 'skill_match',
+    'experience_matching': 'experience_match',
+    'education_matching': 'education_match',
+}
+
+def compile_weights(weights):
+    """Validate a weights mapping and return it keyed by COMPONENTS.
+
+    Missing components weigh 0. Weights that do not sum to 1 are rescaled so
+    total scores stay on the 0-100 scale.
+    """
+    if not isinstance(weights, dict):
+        raise ValueError("Scoring weights must be an object")
+    compiled = dict.fromkeys(COMPONENTS, 0.0)
+    for key, value in weights.items():
+        component = WEIGHT_ALIASES.get(key, key)
+        if component not in compiled:
+            raise ValueError(f"Unknown scoring component: {key}")
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value) or value < 0:
+            raise ValueError(f"Weight of {key} must be a non-negative number")
+        compiled[component] = value
+    total = sum(compiled.values())
+    if total <= 0:
+        raise ValueError("At least one scoring weight must be positive")
+    if abs(total - 1.0) > 1e-9:
+        compiled = {component: value / total for component, value in compiled.items()}
+    return compiled
+
+class ScoringProfile:
+    """A named, validated weighting, ready to rank resume pools."""
+
+    def __init__(self, name, weights):
+        self.name = name
+        self.weights = compile_weights(weights)
+
+    def rank(self, job_description, job_skills, resumes_data, resume_skill_sets, tfidf_scores, semantic_scores, k=None):
+        return score_columnar(job_description, job_skills, resumes_data, resume_skill_sets,
+                              tfidf_scores, semantic_scores, k=k, weights=self.weights)
+
+    def to_dict(self):
+        return {'name': self.name, 'weights': self.weights}
+
+def rank_profiles(profiles, job_description, job_skills, resumes_data, resume_skill_sets, tfidf_scores, semantic_scores, k=None):
+    """Rank one pool against several profiles in a single pass, keyed by profile name."""
+    return score_weightings(job_description, job_skills, resumes_data, resume_skill_sets,
+                            tfidf_scores, semantic_scores,
+                            {profile.name: profile.weights for profile in profiles}, k=k)
+
+class ScoringProfiles:
+    """Registry of compiled scoring profiles.
+
+    Always holds the built-in "default" profile. Extra profiles come from the
+    JSON file at SCORING_PROFILES_PATH ({"name": {component: weight}}), which
+    is re-read when it changes, so profiles can be added without a redeploy.
+    Inline weights sent by clients are compiled once and kept in a small LRU.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        with cls._lock:
+            if cls._instance is None:
+                instance = super(ScoringProfiles, cls).__new__(cls)
+                instance.path = os.getenv("SCORING_PROFILES_PATH", "")
+                instance.inline_cache_size = int(os.getenv("SCORING_INLINE_CACHE_SIZE", 64))
+                instance.lock = threading.Lock()
+                instance.profiles = {'default': ScoringProfile('default', WEIGHTS)}
+                instance.inline = OrderedDict()
+                instance.mtime = None
+                cls._instance = instance
+        return cls._instance
+
+    def _reload_if_changed(self):
+        if not self.path:
+            return
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self.mtime:
+            return
+        profiles = {'default': ScoringProfile('default', WEIGHTS)}
+        if mtime is not None:
+            with open(self.path, encoding="utf-8") as f:
+                for name, weights in json.load(f).items():
+                    profiles[name] = ScoringProfile(name, weights)
+        self.profiles = profiles
+        self.mtime = mtime
+
+    def get(self, name):
+        if not isinstance(name, str):
+            raise ValueError("Scoring profile names must be strings")
+        with self.lock:
+            self._reload_if_changed()
+            profile = self.profiles.get(name)
+        if profile is None:
+            raise ValueError(f"Unknown scoring profile: {name}")
+        return profile
+
+    def resolve(self, profile=None, weights=None):
+        """Return the profile for a request: a name, inline `weights`, or "default"."""
+        if isinstance(profile, ScoringProfile):
+            return profile
+        if weights:
+            key = json.dumps(weights, sort_keys=True)
+            with self.lock:
+                compiled = self.inline.get(key)
+                if compiled is not None:
+                    self.inline.move_to_end(key)
+                    return compiled
+            compiled = ScoringProfile('custom', weights)
+            with self.lock:
+                self.inline[key] = compiled
+                while len(self.inline) > self.inline_cache_size:
+                    self.inline.popitem(last=False)
+            return compiled
+        return self.get(profile or 'default')
+
+    def resolve_many(self, names):
+        if not isinstance(names, list) or not names:
+            raise ValueError("profiles must be a non-empty list of profile names")
+        if not all(isinstance(name, str) for name in names):
+            raise ValueError("Scoring profile names must be strings")
+        return [self.get(name) for name in dict.fromkeys(names)]
+
+    def register(self, name, weights):
+        """Add or replace a profile, writing it to SCORING_PROFILES_PATH when set."""
+        if not isinstance(name, str) or not name or name == 'default':
+            raise ValueError("Profile name must be set and not be \"default\"")
+        profile = ScoringProfile(name, weights)
+        with self.lock:
+            self._reload_if_changed()
+            self.profiles[name] = profile
+            if self.path:
+                stored = {n: p.weights for n, p in self.profiles.items() if n != 'default'}
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(stored, f, indent=2)
+                os.replace(tmp_path, self.path)
+                self.mtime = os.stat(self.path).st_mtime_ns
+        return profile
+
+    def to_dict(self):
+        with self.lock:
+            self._reload_if_changed()
+            return {name: profile.weights for name, profile in self.profiles.items()}
@@ -0,0 +1,78 @@
+from dotenv import load_dotenv
+import numpy as np
+import os
+import threading
+load_dotenv()
+
+# Doc.similarity only needs the static word vectors, so the statistical
+# components of the pipeline are never run.
+UNUSED_COMPONENTS = ["tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer", "ner", "senter"]
+
+_nlp = None
+_nlp_lock = threading.Lock()
+_instance_lock = threading.Lock()
+
+def get_nlp():
+    """Load the spaCy model on first use; safe to call from several threads.
+
+    Importing this module stays cheap, so endpoints that never score resumes
+    do not pay for the model. Call it before forking workers to share the
+    model pages copy-on-write (see gunicorn.conf.py).
+    """
+    global _nlp
+    if _nlp is None:
+        with _nlp_lock:
+            if _nlp is None:
+                import spacy
+                _nlp = spacy.load(os.getenv("SPACY_MODEL", "en_core_web_lg"), exclude=UNUSED_COMPONENTS)
+    return _nlp
+
+class SemanticScorer:
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            with _instance_lock:
+                if cls._instance is None:
+                    instance = super(SemanticScorer, cls).__new__(cls)
+                    instance.batch_size = int(os.getenv("SPACY_BATCH_SIZE", 64))
+                    instance.n_process = int(os.getenv("SPACY_N_PROCESS", 1))
+                    cls._instance = instance
+        return cls._instance
+
+    @property
+    def nlp(self):
+        return get_nlp()
+
+    def doc_vectors(self, texts, batch_size=None, n_process=None):
+        """Averaged word vectors for `texts`, one row per text."""
+        docs = self.nlp.pipe(
+            texts,
+            batch_size=batch_size or self.batch_size,
+            n_process=n_process or self.n_process,
+        )
+        vectors = np.zeros((len(texts), self.nlp.vocab.vectors_length), dtype=np.float32)
+        for i, doc in enumerate(docs):
+            vectors[i] = doc.vector
+        return vectors
+
+    def score(self, job_text, texts, batch_size=None, n_process=None):
+        """Cosine similarity between `job_text` and every text in `texts`.
+
+        Matches Doc.similarity: texts without any known word vector score 0.
+        """
+        if not texts:
+            return np.zeros(0)
+        job_vector = self.nlp(job_text).vector
+        resume_vectors = self.doc_vectors(texts, batch_size=batch_size, n_process=n_process)
+        return cosine_to_vector(job_vector, resume_vectors).astype(np.float64)
+
+def cosine_to_vector(query, matrix):
+    query = np.asarray(query, dtype=np.float32)
+    matrix = np.asarray(matrix, dtype=np.float32)
+    query_norm = np.linalg.norm(query)
+    row_norms = np.linalg.norm(matrix, axis=1)
+    denom = row_norms * query_norm
+    scores = np.zeros(matrix.shape[0], dtype=np.float32)
+    np.divide(matrix @ query, denom, out=scores, where=denom > 0)
+    return scores
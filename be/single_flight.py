@@ -0,0 +1,112 @@
+from concurrent.futures import Future
+from copy import deepcopy
+import hashlib
+import os
+import threading
+from metrics import LLM_COALESCED
+
+class _Flight:
+    def __init__(self):
+        self.result = Future()
+        self.call = None
+        self.waiters = 0
+
+class SingleFlight:
+    """Coalesce identical concurrent LLM calls of one agent.
+
+    Callers whose prompts hash the same while a call is in flight wait on
+    that call instead of starting their own, and each gets a copy of its
+    parsed result. Errors are shared the same way. The underlying request is
+    only cancelled once every waiter has gone. Nothing is cached: a call that
+    has finished is not reused.
+    """
+    registry = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, name, client, parse):
+        self.name = name
+        self.client = client
+        self.parse = parse
+        self.lock = threading.Lock()
+        self.inflight = {}
+        self.counters = {"calls": 0, "requests": 0, "coalesced": 0}
+        self.pid = os.getpid()
+        with self._registry_lock:
+            self.registry[name] = self
+
+    @staticmethod
+    def make_key(prompt):
+        return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+    def _join(self, prompt):
+        key = self.make_key(prompt)
+        with self.lock:
+            if self.pid != os.getpid():
+                # Calls in flight in the parent never finish in a forked child.
+                self.inflight = {}
+                self.pid = os.getpid()
+            self.counters["calls"] += 1
+            flight = self.inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                flight.call = self.client.submit(prompt)
+                self.inflight[key] = flight
+                self.counters["requests"] += 1
+            else:
+                self.counters["coalesced"] += 1
+                LLM_COALESCED.inc(self.name)
+            flight.waiters += 1
+        if leader:
+            # Outside the lock: the callback runs at once if the call already finished.
+            flight.call.add_done_callback(lambda call: self._land(key, flight, call))
+        return flight
+
+    def _land(self, key, flight, call):
+        with self.lock:
+            if self.inflight.get(key) is flight:
+                del self.inflight[key]
+        if call.cancelled():
+            flight.result.cancel()
+            return
+        error = call.exception()
+        if error is not None:
+            flight.result.set_exception(error)
+            return
+        try:
+            flight.result.set_result(self.parse(call.result()))
+        except Exception as e:
+            flight.result.set_exception(e)
+
+    def _leave(self, flight):
+        with self.lock:
+            flight.waiters -= 1
+            abandoned = flight.waiters == 0 and not flight.result.done()
+            if abandoned:
+                # Later callers must start a fresh call, not join a cancelled one.
+                self.inflight = {k: f for k, f in self.inflight.items() if f is not flight}
+        if abandoned:
+            flight.call.cancel()
+
+    def call(self, prompt):
+        """Blocking call for synchronous callers."""
+        flight = self._join(prompt)
+        try:
+            return deepcopy(flight.result.result())
+        finally:
+            self._leave(flight)
+
+    def stats(self):
+        with self.lock:
+            counters = dict(self.counters)
+            inflight = len(self.inflight)
+        return {
+            **counters,
+            "inflight": inflight,
+            "coalescing_ratio": round(counters["coalesced"] / counters["calls"], 4) if counters["calls"] else 0.0,
+        }
+
+def single_flight_stats():
+    with SingleFlight._registry_lock:
+        flights = dict(SingleFlight.registry)
+    return {name: flight.stats() for name, flight in flights.items()}
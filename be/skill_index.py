@@ -0,0 +1,60 @@
+from collections import Counter, defaultdict
+import heapq
+
+class SkillIndex:
+    """Inverted index from skill ID to the documents (candidate rows) that list it."""
+
+    def __init__(self):
+        self.postings = defaultdict(set)
+        self.skills_by_doc = {}
+
+    def add(self, doc_id, skill_ids):
+        self.remove(doc_id)
+        skill_ids = set(skill_ids)
+        self.skills_by_doc[doc_id] = skill_ids
+        for skill_id in skill_ids:
+            self.postings[skill_id].add(doc_id)
+
+    def remove(self, doc_id):
+        for skill_id in self.skills_by_doc.pop(doc_id, ()):
+            docs = self.postings.get(skill_id)
+            if docs is not None:
+                docs.discard(doc_id)
+                if not docs:
+                    del self.postings[skill_id]
+
+    def __len__(self):
+        return len(self.skills_by_doc)
+
+    def docs_with_any(self, skill_ids):
+        docs = set()
+        for skill_id in skill_ids:
+            docs |= self.postings.get(skill_id, set())
+        return docs
+
+    def overlap(self, skill_ids):
+        """Number of `skill_ids` each document shares, for documents sharing at least one."""
+        counts = Counter()
+        for skill_id in set(skill_ids):
+            counts.update(self.postings.get(skill_id, ()))
+        return counts
+
+    def retrieve(self, skill_ids, total_skills, min_skill_match=0.0, limit=None, doc_ids=None):
+        """Documents whose share of the `total_skills` job skills is at least `min_skill_match`.
+
+        `doc_ids` restricts the search, `limit` keeps only the documents with
+        the largest overlap. Returns (doc_id, overlap) pairs, best first when
+        limited.
+        """
+        counts = self.overlap(skill_ids)
+        if min_skill_match > 0:
+            needed = min_skill_match * total_skills
+            hits = [(doc, n) for doc, n in counts.items() if n >= needed]
+        else:
+            # Every document qualifies, including those sharing no skill.
+            hits = [(doc, counts.get(doc, 0)) for doc in self.skills_by_doc]
+        if doc_ids is not None:
+            hits = [(doc, n) for doc, n in hits if doc in doc_ids]
+        if limit is not None and len(hits) > limit:
+            hits = heapq.nlargest(limit, hits, key=lambda hit: hit[1])
+        return hits
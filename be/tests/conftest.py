@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The backend modules live flat in be/ and import each other by name.
+BE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BE_DIR not in sys.path:
+    sys.path.insert(0, BE_DIR)
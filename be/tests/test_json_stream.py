@@ -0,0 +1,58 @@
+import json
+import random
+
+import pytest
+
+from json_stream import JSONFieldStream
+
+DOCUMENT = {
+    "introduction": "Frontend developer, {React} and \"TypeScript\", 3 years",
+    "years": 12,
+    "score": -0.125,
+    "remote": False,
+    "manager": None,
+    "skills": ["React", "TypeScript", "CSS, SASS"],
+    "education": {"degree": "BSc", "fields": ["Software Engineering"]},
+}
+
+def feed_in_chunks(text, sizes):
+    stream = JSONFieldStream()
+    completed = []
+    pos = 0
+    for size in sizes:
+        completed += stream.feed(text[pos:pos + size])
+        pos += size
+    completed += stream.feed(text[pos:])
+    return stream, completed
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_chunking_yields_every_field_once(seed):
+    rng = random.Random(seed)
+    text = "```json\n" + json.dumps(DOCUMENT, indent=rng.choice([None, 2])) + "\n```"
+    sizes = [rng.randint(1, 7) for _ in range(len(text))]
+
+    stream, completed = feed_in_chunks(text, sizes)
+
+    assert [key for key, _ in completed] == list(DOCUMENT)
+    assert dict(completed) == DOCUMENT
+    assert stream.fields == DOCUMENT
+    assert stream.finished
+
+def test_partial_number_is_not_reported_until_its_separator_arrives():
+    stream = JSONFieldStream()
+    assert stream.feed('{"years": 1') == []
+    assert stream.feed('2') == []
+    assert stream.feed(', "name": "A') == [("years", 12)]
+    assert stream.feed('n"}') == [("name", "An")]
+    assert stream.finished
+
+def test_text_before_the_object_is_skipped():
+    stream = JSONFieldStream()
+    assert stream.feed("Sure, here is the result:\n```") == []
+    assert stream.feed('json\n{"a": [1, 2]}') == [("a", [1, 2])]
+
+def test_nothing_is_reported_after_the_object_ends():
+    stream = JSONFieldStream()
+    assert stream.feed('{"a": 1}') == [("a", 1)]
+    assert stream.feed(', "b": 2}') == []
+    assert stream.fields == {"a": 1}
@@ -0,0 +1,93 @@
+import fitz
+import pytest
+
+from metrics import PDF_PAGE_DURATION
+from pdf_engine import PdfTextEngine
+from resume_extractor import ResumeExtractor
+
+LINE = "Experienced engineer with ReactJS, TypeScript, NodeJS, Docker and AWS."
+
+def synthetic_pdf(pages, lines=20):
+    doc = fitz.open()
+    for number in range(pages):
+        page = doc.new_page()
+        text = f"Page {number + 1}\n" + "\n".join(f"{number}.{i} {LINE}" for i in range(lines))
+        page.insert_textbox(fitz.Rect(36, 36, 576, 806), text, fontsize=8)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+def naive_extract(data):
+    text = ""
+    doc = fitz.open(stream=data, filetype="pdf")
+    for page in doc:
+        text += page.get_text("text") + "\n"
+    doc.close()
+    return text.strip()
+
+@pytest.fixture(scope="module")
+def engine():
+    engine = PdfTextEngine()
+    yield engine
+    if engine.pool is not None:
+        engine.pool.shutdown()
+        engine.pool = None
+
+def test_matches_the_page_loop(engine):
+    data = synthetic_pdf(5)
+
+    extraction = engine.extract(data, max_pages=0, max_chars=0, workers=1)
+
+    assert extraction.text == naive_extract(data)
+    assert extraction.page_count == 5
+    assert not extraction.truncated
+    assert [t['page'] for t in extraction.page_timings] == list(range(5))
+
+def test_parallel_matches_sequential(engine):
+    data = synthetic_pdf(engine.parallel_min_pages + 3)
+
+    sequential = engine.extract(data, max_pages=0, max_chars=0, workers=1)
+    parallel = engine.extract(data, max_pages=0, max_chars=0, workers=2)
+
+    assert parallel.pages == sequential.pages
+    assert [t['page'] for t in parallel.page_timings] == [t['page'] for t in sequential.page_timings]
+    assert not parallel.truncated
+
+def test_page_budget(engine):
+    data = synthetic_pdf(6)
+
+    extraction = engine.extract(data, max_pages=2, max_chars=0, workers=1)
+
+    assert extraction.pages == engine.extract(data, max_pages=0, max_chars=0, workers=1).pages[:2]
+    assert extraction.page_count == 6
+    assert extraction.truncated
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_char_budget(engine, workers):
+    data = synthetic_pdf(engine.parallel_min_pages + 3)
+    full = engine.extract(data, max_pages=0, max_chars=0, workers=1).text
+
+    extraction = engine.extract(data, max_pages=0, max_chars=3000, workers=workers)
+
+    assert len(extraction.text) <= 3000
+    assert full.startswith(extraction.text)
+    assert extraction.truncated
+    assert len(extraction.page_timings) == len(extraction.pages)
+
+def test_char_budget_counts_page_separators():
+    pages, cut = PdfTextEngine._apply_char_budget(["abc", "def", "ghi"], 7)
+
+    assert pages == ["abc", "def"]
+    assert cut
+    assert PdfTextEngine._apply_char_budget(["abc", "def"], 7) == (["abc", "def"], False)
+
+def test_resume_extractor_records_pages_and_warns_on_truncation(engine, monkeypatch, caplog):
+    data = synthetic_pdf(4)
+    monkeypatch.setattr(engine, "max_pages", 3)
+    before = sum(PDF_PAGE_DURATION.values.get((), [[0]])[0])
+
+    text = ResumeExtractor().extract_text_from_pdf(data)
+
+    assert text == engine.extract(data, max_pages=3, max_chars=0, workers=1).text
+    assert sum(PDF_PAGE_DURATION.values[()][0]) - before == 3
+    assert "cut to the extraction budget" in caplog.text
@@ -0,0 +1,27 @@
+from prompt_builder import PromptBuilder, normalize_text, normalize_whitespace
+
+def test_explicit_page_numbers_are_dropped():
+    text = "Summary\nPage 1\nExperience\n2 of 3\nProjects\n3/3\npage 4 of 4\nSkills"
+
+    assert normalize_text(text) == "Summary\nExperience\nProjects\nSkills"
+
+def test_bare_page_counter_is_dropped():
+    text = "John Doe\n1\nExperience at ACME\n2\nEducation\n3"
+
+    assert normalize_text(text) == "John Doe\nExperience at ACME\nEducation"
+
+def test_lone_numbers_are_kept():
+    text = "Phone\n0912345678\nGraduated\n2020\nTeam size\n5"
+
+    assert normalize_text(text) == text
+
+def test_chat_messages_keep_every_line():
+    assert normalize_whitespace("  2 ") == "2"
+    assert normalize_whitespace("Which one?\n\n\n\n1\n2\r\n  a   b ") == "Which one?\n\n1\n2\na b"
+
+def test_builder_uses_its_normalizer():
+    chat = PromptBuilder("Answer the message.", header='Message', normalize=normalize_whitespace)
+    documents = PromptBuilder("Read the documents.", header='Documents')
+
+    assert chat.build([(None, "2")]).endswith("Message:\n2")
+    assert documents.build([("Resume", "Skills\nPage 1 of 2\nPython")]).endswith("Resume: Skills\nPython")
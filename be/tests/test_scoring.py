@@ -0,0 +1,73 @@
+import random
+
+import numpy as np
+import pytest
+
+from benchmarks.reference_scoring import combine_scores_loop
+from matching import combine_scores, normalize_skill
+from scoring import top_indices
+
+SKILLS = ['HTML', 'CSS', 'Javascript', 'TypeScript', 'ReactJs', 'NodeJS', 'Python', 'Docker',
+          'AWS', 'MySQL', 'Teamwork', 'English communication']
+AREAS = ['Software Engineer', 'Computer Science', 'Data Science', 'Business Administration']
+
+def random_pool(rng, n):
+    resumes = []
+    for i in range(n):
+        resume = {
+            'applicant_name': f'Applicant {i}',
+            'area_of_study': rng.choice(AREAS + [a.upper() for a in AREAS]),
+            'skills': rng.sample(SKILLS, rng.randint(0, len(SKILLS))),
+            'experiences': [{}] * rng.randint(0, 4),
+        }
+        # Resumes without an id fall back to their position.
+        if rng.random() < 0.8:
+            resume['id'] = f'r{i}'
+        resumes.append(resume)
+    return resumes
+
+def random_job(rng):
+    return {
+        'required_skills': rng.sample(SKILLS, rng.randint(0, 8)),
+        'min_experience': rng.randint(0, 3),
+        'education_fields': rng.sample(['software engineer', 'computer science', 'data science'], rng.randint(0, 2)),
+    }
+
+def comparable(results):
+    return [
+        (r['id'], r['applicant_name'], r['total_score'], r['score_breakdown'],
+         sorted(r['matched_skills']), sorted(r['missing_skills']))
+        for r in results
+    ]
+
+@pytest.mark.parametrize("seed", range(30))
+def test_vectorized_matches_loop(seed):
+    rng = random.Random(seed)
+    n = rng.randint(1, 300)
+    resumes = random_pool(rng, n)
+    job = random_job(rng)
+    # Coarse scores make ties common, so their order is checked as well.
+    tfidf = [rng.choice([0.0, 0.25, 0.5, rng.random()]) for _ in range(n)]
+    semantic = np.array([rng.choice([0.0, 0.5, rng.random()]) for _ in range(n)])
+    skill_sets = [set(normalize_skill(s) for s in r['skills']) for r in resumes] if seed % 2 else None
+
+    for k in (None, 0, 1, rng.randint(1, n), n, n + 5):
+        expected = combine_scores_loop(job, resumes, tfidf, semantic, resume_skill_sets=skill_sets, k=k)
+        actual = combine_scores(job, resumes, tfidf, semantic, resume_skill_sets=skill_sets, k=k)
+        assert comparable(actual) == comparable(expected), f"k={k}"
+
+def test_empty_pool():
+    job = {'required_skills': ['Python'], 'min_experience': 1, 'education_fields': []}
+
+    assert combine_scores(job, [], [], []) == []
+    assert combine_scores(job, [], [], [], k=3) == []
+
+@pytest.mark.parametrize("seed", range(10))
+def test_top_indices_is_a_stable_descending_sort(seed):
+    rng = np.random.default_rng(seed)
+    values = rng.integers(0, 5, size=50).astype(np.float64)
+    order = sorted(range(len(values)), key=lambda i: values[i], reverse=True)
+
+    assert top_indices(values).tolist() == order
+    for k in (0, 1, 7, 50, 60):
+        assert top_indices(values, k).tolist() == order[:k]
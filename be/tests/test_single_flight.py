@@ -0,0 +1,73 @@
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pytest
+
+from single_flight import SingleFlight
+
+class FakeClient:
+    """Records submitted prompts; every call stays pending until the test finishes it."""
+
+    def __init__(self):
+        self.prompts = []
+        self.calls = []
+
+    def submit(self, prompt):
+        call = Future()
+        self.prompts.append(prompt)
+        self.calls.append(call)
+        return call
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+def test_identical_concurrent_calls_share_one_request():
+    client = FakeClient()
+    flights = SingleFlight("test-share", client, lambda text: {"answer": text, "items": []})
+    callers = 16
+
+    with ThreadPoolExecutor(max_workers=callers) as pool:
+        results = [pool.submit(flights.call, "same prompt") for _ in range(callers)]
+        wait_for(lambda: flights.stats()["calls"] == callers)
+        assert len(client.calls) == 1
+        client.calls[0].set_result("42")
+        results = [future.result(timeout=5) for future in results]
+
+    assert client.prompts == ["same prompt"]
+    assert all(result == {"answer": "42", "items": []} for result in results)
+    # Every caller gets its own copy.
+    results[0]["items"].append("changed")
+    assert results[1]["items"] == []
+    stats = flights.stats()
+    assert (stats["requests"], stats["coalesced"], stats["inflight"]) == (1, callers - 1, 0)
+
+def test_different_prompts_are_not_coalesced():
+    client = FakeClient()
+    flights = SingleFlight("test-distinct", client, lambda text: text)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = [pool.submit(flights.call, f"prompt {i}") for i in range(4)]
+        wait_for(lambda: len(client.calls) == 4)
+        for call, prompt in zip(client.calls, client.prompts):
+            call.set_result(prompt.upper())
+        assert sorted(future.result(timeout=5) for future in results) == [f"PROMPT {i}" for i in range(4)]
+
+def test_errors_are_shared_and_finished_calls_are_not_reused():
+    client = FakeClient()
+    flights = SingleFlight("test-errors", client, lambda text: text)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = [pool.submit(flights.call, "prompt") for _ in range(4)]
+        wait_for(lambda: flights.stats()["calls"] == 4)
+        client.calls[0].set_exception(RuntimeError("quota"))
+        for future in results:
+            with pytest.raises(RuntimeError, match="quota"):
+                future.result(timeout=5)
+
+        retry = pool.submit(flights.call, "prompt")
+        wait_for(lambda: len(client.calls) == 2)
+        client.calls[1].set_result("ok")
+        assert retry.result(timeout=5) == "ok"
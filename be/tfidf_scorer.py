@@ -0,0 +1,76 @@
+from dotenv import load_dotenv
+import numpy as np
+import os
+import threading
+load_dotenv()
+
+_instance_lock = threading.Lock()
+
+class TfidfScorer:
+    """TF-IDF cosine scores computed on the sparse CSR matrix.
+
+    If TFIDF_MODEL_PATH points to a vectorizer fitted with `fit_corpus`, its
+    vocabulary and IDF weights are reused instead of refitting per request.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            with _instance_lock:
+                if cls._instance is None:
+                    instance = super(TfidfScorer, cls).__new__(cls)
+                    instance.model_path = os.getenv("TFIDF_MODEL_PATH", "")
+                    instance.vectorizer = None
+                    if instance.model_path and os.path.exists(instance.model_path):
+                        import joblib
+                        instance.vectorizer = joblib.load(instance.model_path)
+                    cls._instance = instance
+        return cls._instance
+
+    @staticmethod
+    def new_vectorizer():
+        # Imported here so that loading the app does not pull in scikit-learn.
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        return TfidfVectorizer(stop_words="english", ngram_range=(1,2), dtype=np.float32)
+
+    def fit_corpus(self, texts, path=None):
+        """Fit the vocabulary/IDF on a whole corpus and persist it."""
+        path = path or self.model_path
+        if not path:
+            raise ValueError("No path given for the TF-IDF model.")
+        import joblib
+        vectorizer = self.new_vectorizer().fit(texts)
+        joblib.dump(vectorizer, path)
+        self.model_path = path
+        self.vectorizer = vectorizer
+        return vectorizer
+
+    def transform(self, job_text, texts):
+        if self.vectorizer is not None:
+            return self.vectorizer.transform([job_text] + texts)
+        return self.new_vectorizer().fit_transform([job_text] + texts)
+
+    def score(self, job_text, texts):
+        if not texts:
+            return np.zeros(0)
+        matrix = self.transform(job_text, texts).tocsr()
+        job_row = matrix[0]
+        resume_rows = matrix[1:]
+        # Rows are already L2-normalized, so the cosine is a sparse dot product.
+        scores = resume_rows.dot(job_row.T).toarray().ravel()
+        return scores.astype(np.float64)
+
+if __name__ == '__main__':
+    import json
+    import sys
+    from matching import build_resume_text
+
+    if len(sys.argv) < 2:
+        print("Usage: python tfidf_scorer.py <resumes.json> [model_path]")
+        sys.exit(1)
+    with open(sys.argv[1], encoding="utf-8") as f:
+        corpus = json.load(f)
+    corpus_texts = [r if isinstance(r, str) else build_resume_text(r) for r in corpus]
+    model_path = sys.argv[2] if len(sys.argv) > 2 else None
+    TfidfScorer().fit_corpus(corpus_texts, model_path)
+    print(f"Fitted TF-IDF vocabulary on {len(corpus_texts)} documents")